@@ -5,21 +5,22 @@ using Genetic Algorithms (GAs).
 
 
 from simulation.fsm import fsm
+from simulation.fsm import distinguishability as ds
 from simulation.sst import sst
+from simulation.sst import partition_sst as psst
+from simulation.sst import split_memo as sm
+from simulation.sst import prefix_cache as pc
 from simulation.evaluation import fitness_evaluation as fe
 from simulation.evaluation import uio_statistics as st
 from simulation.ga import ga
+from simulation.search import exhaustive as ex
+from simulation.search import splitting_tree as stree
 import json
 import os
-import sys
 from datetime import datetime
 import pickle
 
 
-x = sys.getrecursionlimit()
-sys.setrecursionlimit(50*x)
-
-
 width = 65
 info = []
 
@@ -87,6 +88,19 @@ def save_uio_data(f_base, uio_stat, stat_enabled, ext='txt'):
         fn.write(str(uio_stat.all_discovered_uios))
         fn.write('\n\n')
 
+        if uio_stat.states_without_uios is not None:
+            fn.write('  States without UIOs\n')
+            fn.write('-'*width + '\n')
+            fn.write(str(uio_stat.states_without_uios))
+            fn.write('\n\n')
+
+        if uio_stat.ads_found is not None:
+            fn.write('  Adaptive distinguishing sequence\n')
+            fn.write('-'*width + '\n')
+            fn.write('Found' if uio_stat.ads_found else
+                     'None: the FSM has no adaptive distinguishing sequence')
+            fn.write('\n\n')
+
         if stat_enabled:
             fn.write('  Generation based discovred UIOs\n')
             fn.write('-'*width + '\n')
@@ -206,6 +220,30 @@ def read_settings():
     return f_gen_name, parms, all_targetted_uios, f_template
 
 
+def states_without_uios(f_template, dist=None):
+    """
+    The function lists, in ID order, the original states known to have no
+    UIO. For a minimised FSM, these are all the states merged with others,
+    as the states of a block cannot be told apart. If the pairwise
+    distinguishability is given, they also include the states it rules
+    out. It returns None if neither is known.
+    """
+    blocks = f_template.state_blocks
+    if blocks is None:
+        if dist is None:
+            return None
+        blocks = [(s.id, ) for s in f_template.states]
+
+    if dist is None:
+        candidates = range(len(blocks))
+    else:
+        candidates = set(dist.uio_candidates())
+
+    return sorted(s_id for b, block in enumerate(blocks)
+                  if len(block) > 1 or b not in candidates
+                  for s_id in block)
+
+
 #  ----------------------------------------------------
 #      Start simulation here ...
 #  ----------------------------------------------------
@@ -214,22 +252,76 @@ def start_sim(f_gen_name,
               all_targetted_uios,
               f_template):
 
-    sst_template = sst.SST(fsm=f_template)
+    #  Run the GA on the quotient FSM and report the UIOs for the original
+    #  states.
+    if parms['FSM'].get('MinimiseEnabled'):
+        f_template = f_template.minimise()
+
     fitness_eval = fe.FitnessEvaluation(parms)
     uio_stat = st.UIOStatistics(parms, all_targetted_uios)
 
-    g_sim = ga.GA(f_template, sst_template, parms)
-
-    funcs = [(g_sim.start, (fitness_eval, uio_stat))]
+    #  Pairwise distinguishability tells up front which states cannot have
+    #  UIOs and lets the SST skip nodes that cannot produce any.
+    dist = None
+    if parms['SST']['DistinguishabilityEnabled']:
+        dist = ds.Distinguishability(f_template,
+                                     parms['MaxUIOLength'],
+                                     threads=sys_config['CPUs'])
+    uio_stat.states_without_uios = states_without_uios(f_template, dist)
+
+    engine = parms['UIOEngines'][parms['UIOEngineSelection']]
+    split_memo = None
+    prefix_cache = None
+    stat_enabled = parms['GA']['StatisticsEnabled']
+
+    if engine == 'exhaustive':
+        #  Exact search over all input sequences up to MaxUIOLength. There
+        #  are no generations, so there are no GA statistics either.
+        e_sim = ex.ExhaustiveSearch(f_template, parms)
+        funcs = [(e_sim.start, (uio_stat, ))]
+        stat_enabled = False
+    elif engine == 'splitting_tree':
+        #  UIOs of every state from an adaptive distinguishing sequence, if
+        #  the FSM has one.
+        t_sim = stree.SplittingTree(f_template, parms)
+        funcs = [(t_sim.start, (uio_stat, ))]
+        stat_enabled = False
+    else:
+        if parms['SST']['PrefixCacheSize'] > 0:
+            prefix_cache = pc.PrefixCache(parms['SST']['PrefixCacheSize'])
+
+        sst_type = parms['SST']['TypeOptions'][parms['SST']['TypeSelection']]
+        if sst_type == 'PartitionSST':
+            sst_template = psst.PartitionSST(fsm=f_template,
+                                             distinguishability=dist,
+                                             max_depth=parms['MaxUIOLength'],
+                                             prefix_cache=prefix_cache)
+        else:
+            if parms['SST']['SplitMemoSize'] > 0:
+                split_memo = sm.SplitMemo(parms['SST']['SplitMemoSize'])
+            sst_template = sst.SST(fsm=f_template,
+                                   distinguishability=dist,
+                                   max_depth=parms['MaxUIOLength'],
+                                   split_memo=split_memo,
+                                   prefix_cache=prefix_cache,
+                                   trace_enabled=parms['SST']['TraceEnabled'])
+
+        g_sim = ga.GA(f_template, sst_template, parms)
+
+        funcs = [(g_sim.start, (fitness_eval, uio_stat))]
     
     # if parms['GA']['StatisticsEnabled']:
     #    funcs.append((save_simulation_result, (f_gen_name, uio_stat)))
 
     ts = measure_times(funcs)
     print('')
+    if split_memo is not None:
+        print(split_memo)
+    if prefix_cache is not None:
+        print(prefix_cache)
     save_simulation_result(f_gen_name,
                            uio_stat,
-                           parms['GA']['StatisticsEnabled'])
+                           stat_enabled)
 
     return ts
 
@@ -321,8 +413,6 @@ def start(printing_enabled=True):
     with open(f_time_name, 'w') as fn:
         fn.write('\n'.join(info))
 
-    sys.setrecursionlimit(x)
-
 
 
 if __name__ == '__main__':
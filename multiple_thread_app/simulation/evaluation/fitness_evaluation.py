@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 
 class FitnessEvaluation:
@@ -14,26 +15,39 @@ class FitnessEvaluation:
         self.sd_func = eval(self.parms['SSTLayerInputRules'][index])
 
 
-    def similarity(self, ind1, ind2, base=1, prv_sd=1, n=1, sd=0):
-        if ind1 == '' or ind2 == '':
-            return sd / n
+    def similarity(self, ind1, ind2, rule=None):
+        """
+        The similarity degree of two chromosomes is computed block by block,
+        where blocks follow the SST layer input rule, or the given rule if
+        the GA lays out its chromosomes with another one. The degree of a
+        block is the fraction of equal inputs in it, times the degree of
+        the block before, and the result is the sum of the block degrees
+        over the number of blocks plus one.
+        """
+        if rule is None:
+            rule = self.sd_func
 
-        cmp1 = ind1[:base]
-        ind1 = ind1[base:]
-        
-        cmp2 = ind2[:base]
-        ind2 = ind2[base:]
+        length = min(len(ind1), len(ind2))
+        equal = np.asarray(ind1[:length]) == np.asarray(ind2[:length])
 
-        #  We can propose parallel here ...
-        current_sd = 0
-        for i in range(len(cmp1)):
-            if cmp1[i] == cmp2[i]:
-                current_sd = current_sd + 1
-        current_sd = prv_sd * (current_sd / len(cmp1))
+        start = 0
+        base = 1
+        prv_sd = 1
+        n = 1
+        sd = 0
+        while start < length:
+            stop = start + base
+            block_size = min(stop, len(ind1)) - start
+            current_sd = int(np.count_nonzero(equal[start:stop]))
+            current_sd = prv_sd * (current_sd / block_size)
 
-        base = self.sd_func(base)
+            prv_sd = current_sd
+            n = n + 1
+            sd = sd + current_sd
+            start = stop
+            base = rule(base)
 
-        return self.similarity(ind1, ind2, base, current_sd, n+1, sd+current_sd)
+        return sd / n
 
 
     def __scaling(self, val, enabled=True):
@@ -49,14 +63,10 @@ class FitnessEvaluation:
 
 
     def __single_layer_eval(self, layer, prv_xi, prv_yi):
-        delta_xi = 0
-        delta_yi = 0
-
-        for node in layer.nodes:
-            if node.is_discrete():
-                delta_xi = delta_xi + 1
-            else:
-                delta_yi = delta_yi + 1
+        #  Count the discrete nodes and the others through the layer, so
+        #  that any SST representation can be evaluated.
+        delta_xi = layer.number_of_discrete_nodes()
+        delta_yi = layer.number_of_nodes() - delta_xi
 
         xi = prv_xi + delta_xi
         yi = prv_yi + delta_yi
@@ -86,21 +96,15 @@ class FitnessEvaluation:
         The function returns its original fitness value and the scaled fitness
         value while the latter is used for selection.
         """
-        if layers == []:
-            return (fitness/n,
-                    self.__scaling(fitness/n, enabled=scaling_enabled))
-
-        layer, *layers = layers
-
-        x, y, f = self.__single_layer_eval(layer, x, y)
-
-        return self.layer_based_fitness(layers, n, x, y, fitness+f,
-                                        scaling_enabled=scaling_enabled)
+        for layer in layers:
+            x, y, f = self.__single_layer_eval(layer, x, y)
+            fitness = fitness + f
 
+        return (fitness/n,
+                self.__scaling(fitness/n, enabled=scaling_enabled))
 
-    def eval_sst(self, attr, scaling_enabled=True):
-        sst = attr['sst']
 
+    def eval_sst(self, sst, scaling_enabled=True):
         return self.layer_based_fitness(sst.layers[1:],
                                         len(sst.layers),
                                         scaling_enabled=scaling_enabled)
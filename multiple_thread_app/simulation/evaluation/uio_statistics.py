@@ -14,6 +14,13 @@ class UIOStatistics:
         self.gen_uio_frequencies = {}
         self.gen_discovered_uios = {}
 
+        #  States known up front to have no UIO within MaxUIOLength.
+        self.states_without_uios = None
+
+        #  Whether the FSM has an adaptive distinguishing sequence, once the
+        #  splitting tree has looked for one.
+        self.ads_found = None
+
         gen_from, interval = parms['GA']['StatisticsGenInterval']
         if interval is None:
             interval = parms['GA']['Generation']
@@ -23,8 +30,7 @@ class UIOStatistics:
         self.gens_for_statistics = gens_collected[:interval]
 
 
-    def compute_stat(self, gen, pop):
-        fitnesses = [ind[0]['fitness'] for ind in pop]
+    def compute_stat(self, gen, fitnesses):
         f_max = max(fitnesses)
         f_min = min(fitnesses)
         f_mean = st.mean(fitnesses)
@@ -32,14 +38,13 @@ class UIOStatistics:
         self.gen_statistics[gen] = (f_max, f_min, f_mean, f_std)
 
 
-    def compute_UIO_distribution(self, gen, pop):
+    def compute_UIO_distribution(self, gen, ssts):
         """
         A dictionary uios is defined to store that numbers of SSTs that
         have explored 1, 2, ..., n UIOs respectively.
         """
         uios = {}
-        for ind in pop:
-            sst = ind[0]['sst']
+        for sst in ssts:
             num = sst.number_of_uios()
             uios[num] = uios.get(num, 0) + 1
         self.gen_uio_distribution[gen] = uios
@@ -82,9 +87,9 @@ class UIOStatistics:
         self.gen_discovered_uios = {}
 
 
-    def process(self, gen, pop):
-        self.compute_stat(gen, pop)
-        self.compute_UIO_distribution(gen, pop)
+    def process(self, gen, fitnesses, ssts):
+        self.compute_stat(gen, fitnesses)
+        self.compute_UIO_distribution(gen, ssts)
 
 
     def plot_trendency_graph(self, save=None):
@@ -0,0 +1,58 @@
+from . import state
+
+
+class FSMCursor:
+    """
+    A cursor is a light-weight copy of an FSM. It only holds the IDs of
+    its initial and current states while the FSM structure itself, i.e.,
+    states, transitions and the compiled tables, is shared and read-only.
+    """
+    __slots__ = ('fsm', 'init_state_id', 'current_state_id')
+
+    def __init__(self, fsm, init_s=0, current_s=None):
+        self.fsm = fsm
+        self.init_state_id = init_s
+        self.current_state_id = init_s if current_s is None else current_s
+
+
+    @property
+    def init_state(self):
+        return self.__state(self.init_state_id)
+
+
+    @property
+    def current_state(self):
+        return self.__state(self.current_state_id)
+
+
+    def __state(self, s_id):
+        if s_id == -1:
+            return self.fsm.ERROR_STATE
+        return self.fsm.states[s_id]
+
+
+    def set_init_state(self, init_s=0):
+        if isinstance(init_s, state.State):
+            init_s = init_s.id
+        self.init_state_id = init_s
+        return self.init_state_id
+
+
+    def set_current_state(self, current_s=0):
+        if isinstance(current_s, state.State):
+            current_s = current_s.id
+        self.current_state_id = current_s
+        return self.current_state_id
+
+
+    def reset(self):
+        self.current_state_id = self.init_state_id
+
+
+    def copy(self):
+        return FSMCursor(self.fsm, self.init_state_id, self.current_state_id)
+
+
+    def __deepcopy__(self, memo):
+        #  The FSM is shared by all cursors and must never be copied.
+        return self.copy()
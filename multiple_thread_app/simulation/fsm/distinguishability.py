@@ -0,0 +1,170 @@
+import threading
+import numpy as np
+
+
+class Distinguishability:
+    """
+    For every pair of states, the class computes the length of the shortest
+    input sequence that distinguishes them, up to max_length, with a
+    breadth-first search over the product machine. A pair of states that
+    produce different outputs on input a is distinguished at length 1; a
+    pair that produces the same output on a and moves to a pair
+    distinguished at length d is distinguished at length d+1.
+
+    The lengths are kept in a uint8 matrix where 0 means the pair is not
+    distinguished within max_length. A second matrix keeps the first input
+    of a shortest sequence, so the sequence itself can be rebuilt by
+    following the transitions. Each level of the search is computed in
+    blocks of rows that are shared among threads.
+    """
+    NOT_DISTINGUISHED = 0
+
+    def __init__(self, fsm, max_length=255, threads=1, block_size=None):
+        self.fsm = fsm
+        self.max_length = min(max_length, np.iinfo(np.uint8).max)
+        self.threads = max(1, threads)
+
+        #  The sink state takes the index N, the error row of the tables.
+        n = fsm.num_of_states + 1
+        self.next_states = np.array(fsm.next_state_table, dtype=np.intp)
+        self.next_states[self.next_states == -1] = n - 1
+        self.outputs = np.asarray(fsm.output_table)
+
+        if block_size is None:
+            #  Keep the temporary arrays of a block to about 4M entries.
+            block_size = max(1, (1 << 22) // n)
+        self.blocks = [(start, min(start+block_size, n))
+                       for start in range(0, n, block_size)]
+
+        self.lengths = np.zeros((n, n), dtype=np.uint8)
+        self.inputs = np.zeros((n, n), dtype=fsm.input_dtype)
+
+        self.__compute()
+
+        #  The eccentricity of a state is the length within which it is
+        #  distinguished from all other states (255 if it is not).
+        lengths = self.lengths.copy()
+        lengths[lengths == Distinguishability.NOT_DISTINGUISHED] = (
+            np.iinfo(np.uint8).max)
+        np.fill_diagonal(lengths, 0)
+        self.eccentricity = lengths.max(axis=1)
+
+
+    def __compute(self):
+        for level in range(1, self.max_length+1):
+            counts = [0] * self.threads
+            threads = []
+            for k in range(self.threads):
+                t = threading.Thread(target=self.__compute_blocks,
+                                     args=(level, k, counts))
+                t.start()
+                threads.append(t)
+
+            for t in threads:
+                t.join()
+
+            if sum(counts) == 0:
+                break
+
+
+    def __compute_blocks(self, level, k, counts):
+        for start, stop in self.blocks[k::self.threads]:
+            counts[k] = counts[k] + self.__compute_block(level, start, stop)
+
+
+    def __compute_block(self, level, start, stop):
+        """
+        The function finds the pairs with their first state in rows
+        [start, stop) that are distinguished at the given level. Pairs
+        found at this level are only written to these rows, while the
+        previous level is read from the whole matrix.
+        """
+        lengths = self.lengths[start:stop]
+        found = 0
+
+        for a in range(self.outputs.shape[1]):
+            o_rows = self.outputs[start:stop, a][:, None]
+            o_cols = self.outputs[:, a][None, :]
+
+            if level == 1:
+                new = o_rows != o_cols
+            else:
+                s_rows = self.next_states[start:stop, a][:, None]
+                s_cols = self.next_states[:, a][None, :]
+                new = ((o_rows == o_cols) &
+                       (self.lengths[s_rows, s_cols] == level-1))
+
+            new &= lengths == Distinguishability.NOT_DISTINGUISHED
+            lengths[new] = level
+            self.inputs[start:stop][new] = a
+            found = found + int(np.count_nonzero(new))
+
+        return found
+
+
+    def length(self, s1, s2):
+        return int(self.lengths[s1, s2])
+
+
+    def sequence(self, s1, s2):
+        """
+        The function returns the input codes of a shortest sequence that
+        distinguishes two states, or None if there is none within
+        max_length.
+        """
+        if self.lengths[s1, s2] == Distinguishability.NOT_DISTINGUISHED:
+            return None
+
+        inputs = []
+        while True:
+            a = int(self.inputs[s1, s2])
+            inputs.append(a)
+            if self.outputs[s1, a] != self.outputs[s2, a]:
+                return inputs
+            s1 = self.next_states[s1, a]
+            s2 = self.next_states[s2, a]
+
+
+    def uio_candidates(self, max_length=None):
+        """
+        A state can only have a UIO of at most max_length inputs if it can
+        be distinguished from every other state within max_length. The
+        function returns the IDs of the states that pass this test.
+        """
+        if max_length is None:
+            max_length = self.max_length
+
+        n = self.fsm.num_of_states
+        lengths = self.lengths[:n, :n]
+        ok = ((lengths != Distinguishability.NOT_DISTINGUISHED) &
+              (lengths <= max_length))
+        np.fill_diagonal(ok, True)
+        return np.nonzero(np.all(ok, axis=1))[0].tolist()
+
+
+    def separable(self, current_ids, depth):
+        """
+        The function tells whether any of the given current states can be
+        separated from all the others within depth inputs, i.e., whether a
+        node holding these states could still produce a UIO.
+        """
+        #  The caller's IDs are left as they are: the error state -1 is
+        #  mapped to the sink in a new array.
+        current_ids = np.asarray(current_ids, dtype=np.intp)
+        current_ids = np.where(current_ids == -1, self.fsm.num_of_states,
+                               current_ids)
+
+        #  Quick test: a state that is distinguished from every state within
+        #  depth is separable unless another member has the same state.
+        near = self.eccentricity[current_ids] <= depth
+        if near.any():
+            values, counts = np.unique(current_ids, return_counts=True)
+            single = counts[np.searchsorted(values, current_ids)] == 1
+            if np.any(near & single):
+                return True
+
+        lengths = self.lengths[current_ids[:, None], current_ids[None, :]]
+        ok = ((lengths != Distinguishability.NOT_DISTINGUISHED) &
+              (lengths <= depth))
+        np.fill_diagonal(ok, True)
+        return bool(np.any(np.all(ok, axis=1)))
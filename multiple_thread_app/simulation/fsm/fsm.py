@@ -1,44 +1,155 @@
 from . import state
 from . import transition
+from . import cursor
+from . import minimisation
 import copy
+import gc
+import json
+import mmap
 import random
-import sys
+import struct
 import os
 from datetime import datetime
+import numpy as np
 
 
 class FSM:
     SEP = ':'
 
+    #  Binary FSM files: a fixed header (magic, version, number of states,
+    #  input size, metadata size) followed by the next-state, output and
+    #  transition ID tables as little-endian int32, and a JSON block with
+    #  the alphabets and tokens.
+    BINARY_EXT = '.fsmb'
+    BINARY_MAGIC = b'FSMB'
+    BINARY_VERSION = 1
+    BINARY_HEADER = struct.Struct('<4sIIIQ8x')
+    BINARY_DTYPE = np.dtype('<i4')
+
+    #  A single shared error state (id = -1) that is entered whenever an
+    #  input has no transition defined from the current state.
+    ERROR_STATE = state.State()
+
     def __init__(self, f_fsm_file=None, parms={}, save_enabled=True):
+        self.__init_attributes(parms)
+
+        if f_fsm_file and f_fsm_file.endswith(FSM.BINARY_EXT):
+            self.__load_binary(f_fsm_file)
+        elif f_fsm_file:
+            self.__read_fsm(f_fsm_file)
+        else:
+            self.__generate_random_fsm(save_enabled)
+
+
+    def __init_attributes(self, parms):
         self.parms = parms
         self.num_of_states = 0
         self.num_of_transitions = 0
         self.input_set = None
         self.output_set = None
         self.states = []
-        self.transitions = []
+        self.__transitions = None
         self.current_state = None
         self.init_state = None
+        self.input_codes = {}
+        self.output_codes = {}
+        self.next_state_table = None
+        self.output_table = None
+        self.transition_id_table = None
+        self.transition_tokens = {}
 
-        if f_fsm_file:
-            self.__read_fsm(f_fsm_file)
-            self.num_of_transitions = len(self.states)
-            self.num_of_transitions = len(self.transitions)
-        else:
-            self.__generate_random_fsm(save_enabled)
-            self.num_of_transitions = len(self.states)
-            self.num_of_transitions = len(self.transitions)
+        #  For a minimised FSM, the original state IDs of each state.
+        self.state_blocks = None
+
+
+    @property
+    def transitions(self):
+        """
+        Transition objects are only needed for printing and saving a
+        machine in the text format. When an FSM is loaded, they are built
+        from the compiled tables on the first access.
+        """
+        if self.__transitions is None:
+            self.__transitions = self.__materialise_transitions()
+        return self.__transitions
+
+
+    @transitions.setter
+    def transitions(self, transitions):
+        self.__transitions = transitions
+
+
+    @property
+    def input_dtype(self):
+        """
+        Input codes are stored in the smallest unsigned integer type that
+        can hold the whole input set.
+        """
+        if len(self.input_set) <= 256:
+            return np.uint8
+        return np.uint16
+
+
+    @staticmethod
+    def __symbol_separator(symbols):
+        #  Sequences of single-character symbols read as plain strings.
+        if all(len(c) == 1 for c in symbols):
+            return ''
+        return ','
+
+
+    def decode_inputs(self, codes):
+        sep = FSM.__symbol_separator(self.input_set)
+        return sep.join([self.input_set[c] for c in codes])
+
+
+    def decode_outputs(self, codes):
+        #  An undefined transition produces no output (None).
+        sep = FSM.__symbol_separator(self.output_set)
+        return sep.join([self.output_set[c] if c != -1 else str(None)
+                         for c in codes])
+
+
+    def __init_tables(self):
+        self.input_codes = {}
+        for code, i in enumerate(self.input_set):
+            if i in self.input_codes:
+                raise ValueError('Duplicated input symbol: ' + i)
+            self.input_codes[i] = code
+
+        self.output_codes = {}
+        for code, o in enumerate(self.output_set):
+            if o in self.output_codes:
+                raise ValueError('Duplicated output symbol: ' + o)
+            self.output_codes[o] = code
+
+        shape = (self.num_of_states + 1, len(self.input_set))
+        self.next_state_table = np.full(shape, -1, dtype=np.int32)
+        self.output_table = np.full(shape, -1, dtype=np.int32)
+        self.transition_id_table = np.full(shape, -1, dtype=np.int32)
+        self.transition_tokens = {}
 
 
     def __read_fsm(self, f_fsm_file):
+        """
+        The function streams an FSM file line by line. The header lines
+        (states, input_set and output_set) must come before the transitions,
+        which are validated and indexed straight into the compiled tables.
+        """
+        start_ids = []
+        end_ids = []
+        input_codes = []
+        output_codes = []
+        tr_ids = []
+        defined = None
+
         with open(f_fsm_file, 'r') as fn:
-            for line in fn:
-                line = line.strip()
-                items = line.split(':')
-                items = [item.strip() for item in items]
-                
-                if items[0].lower() == 'states':
+            for line_no, line in enumerate(fn, 1):
+                items = line.split(FSM.SEP, 5)
+                key = items[0].strip().lower()
+
+                if key == 'states':
+                    items = line.split(FSM.SEP, 2)
                     self.num_of_states = int(items[1])
                     if len(items) > 2:
                         tokens = items[-1]
@@ -47,20 +158,210 @@ class FSM:
                     tokens = tokens.split('|')
                     tokens = [t.strip() for t in tokens]
                     self.__create_states(tokens)
-                elif items[0].lower() == 'input_set':
+                elif key == 'input_set':
                     symbols = items[1].split(',')
                     symbols = [c.strip() for c in symbols]
                     self.input_set = tuple(symbols)
-                elif items[0].lower() == 'output_set':
+                elif key == 'output_set':
                     symbols = items[1].split(',')
                     symbols = [c.strip() for c in symbols]
                     self.output_set = tuple(symbols)
-                elif items[0] == '':
+                elif key == '':
                     continue
                 else:
-                    self.transitions.append(self.__create_trans(items))
-                    self.num_of_transitions += 1
-        self.transitions = tuple(self.transitions)
+                    if defined is None:
+                        if (not self.states or self.input_set is None or
+                                self.output_set is None):
+                            raise ValueError(
+                                '%s:%d: transition before the states, '
+                                'input_set and output_set' %
+                                (f_fsm_file, line_no))
+                        self.__init_tables()
+                        defined = bytearray(self.num_of_states *
+                                            len(self.input_set))
+
+                    try:
+                        tr_id, start_s_id, end_s_id, i, o = items[:5]
+                        tr_id = int(tr_id)
+                        start_s_id = int(start_s_id)
+                        end_s_id = int(end_s_id)
+                        i = self.input_codes[i.strip()]
+                        o = self.output_codes[o.strip()]
+                    except (ValueError, KeyError):
+                        raise ValueError('%s:%d: invalid transition %r' %
+                                         (f_fsm_file, line_no, line.strip()))
+
+                    if not (0 <= start_s_id < self.num_of_states and
+                            0 <= end_s_id < self.num_of_states):
+                        raise ValueError('%s:%d: unknown state in %r' %
+                                         (f_fsm_file, line_no, line.strip()))
+
+                    slot = start_s_id * len(self.input_set) + i
+                    if defined[slot]:
+                        raise ValueError(
+                            '%s:%d: state %d has more than one transition '
+                            'for input %s' % (f_fsm_file, line_no,
+                                              start_s_id, self.input_set[i]))
+                    defined[slot] = 1
+
+                    if len(items) > 5 and items[5].strip() != '':
+                        self.transition_tokens[tr_id] = items[5].strip()
+
+                    tr_ids.append(tr_id)
+                    start_ids.append(start_s_id)
+                    end_ids.append(end_s_id)
+                    input_codes.append(i)
+                    output_codes.append(o)
+
+        if defined is None:
+            self.__init_tables()
+
+        self.next_state_table[start_ids, input_codes] = end_ids
+        self.output_table[start_ids, input_codes] = output_codes
+        self.transition_id_table[start_ids, input_codes] = tr_ids
+        self.num_of_transitions = len(tr_ids)
+
+
+    def __transition_rows(self):
+        """
+        The function returns the defined transitions from the compiled
+        tables as (ID, start state ID, end state ID, input code, output code)
+        rows in the order of their IDs.
+        """
+        s_ids, codes = np.nonzero(self.next_state_table[:-1] != -1)
+        tr_ids = self.transition_id_table[s_ids, codes]
+        order = np.argsort(tr_ids, kind='stable')
+        s_ids = s_ids[order]
+        codes = codes[order]
+        return zip(tr_ids[order].tolist(),
+                   s_ids.tolist(),
+                   self.next_state_table[s_ids, codes].tolist(),
+                   codes.tolist(),
+                   self.output_table[s_ids, codes].tolist())
+
+
+    def __load_binary(self, f_fsm_file):
+        """
+        The function memory-maps a binary FSM file. The compiled tables are
+        read-only views on the mapped file, so nothing is parsed or copied
+        and processes that load the same file share its pages.
+        """
+        with open(f_fsm_file, 'rb') as fn:
+            data = mmap.mmap(fn.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = FSM.BINARY_HEADER.unpack_from(data)
+        magic, version, num_of_states, num_of_inputs, meta_size = header
+        if magic != FSM.BINARY_MAGIC or version != FSM.BINARY_VERSION:
+            raise ValueError(f_fsm_file + ': not a binary FSM file')
+
+        shape = (num_of_states + 1, num_of_inputs)
+        count = shape[0] * shape[1]
+        offset = FSM.BINARY_HEADER.size
+        tables = []
+        for _ in range(3):
+            table = np.frombuffer(data, dtype=FSM.BINARY_DTYPE,
+                                  count=count, offset=offset)
+            tables.append(table.reshape(shape))
+            offset = offset + count * FSM.BINARY_DTYPE.itemsize
+
+        meta = json.loads(bytes(data[offset:offset+meta_size]))
+
+        self.num_of_states = num_of_states
+        self.input_set = tuple(meta['input_set'])
+        self.output_set = tuple(meta['output_set'])
+        self.input_codes = {i: code for code, i in enumerate(self.input_set)}
+        self.output_codes = {o: code
+                             for code, o in enumerate(self.output_set)}
+        self.next_state_table, self.output_table, self.transition_id_table = (
+            tables)
+        self.transition_tokens = {int(tr_id): t for tr_id, t in
+                                  meta['transition_tokens'].items()}
+        self.num_of_transitions = int(
+            np.count_nonzero(self.next_state_table[:-1] != -1))
+        self.__create_states(meta['state_tokens'])
+
+
+    def save_binary(self, f_name):
+        meta = {'input_set': list(self.input_set),
+                'output_set': list(self.output_set),
+                'state_tokens': [s.token for s in self.states],
+                'transition_tokens': {str(tr_id): t for tr_id, t in
+                                      self.transition_tokens.items()}}
+        meta = json.dumps(meta).encode('utf-8')
+
+        with open(f_name, 'wb') as fn:
+            fn.write(FSM.BINARY_HEADER.pack(FSM.BINARY_MAGIC,
+                                            FSM.BINARY_VERSION,
+                                            self.num_of_states,
+                                            len(self.input_set),
+                                            len(meta)))
+            for table in (self.next_state_table,
+                          self.output_table,
+                          self.transition_id_table):
+                fn.write(np.ascontiguousarray(
+                    table, dtype=FSM.BINARY_DTYPE).tobytes())
+            fn.write(meta)
+
+
+    def save_text(self, f_name):
+        tokens = [s.token for s in self.states]
+        with open(f_name, 'w') as fn:
+            if any(tokens):
+                fn.write('states%s %d%s %s\n' % (FSM.SEP, self.num_of_states,
+                                                FSM.SEP, '|'.join(tokens)))
+            else:
+                fn.write('states%s %d\n' % (FSM.SEP, self.num_of_states))
+            fn.write('input_set%s %s\n' % (FSM.SEP, ', '.join(self.input_set)))
+            fn.write('output_set%s %s\n' % (FSM.SEP,
+                                           ', '.join(self.output_set)))
+            fn.write('\n')
+
+            for tr_id, s_id, e_id, i, o in self.__transition_rows():
+                token = self.transition_tokens.get(tr_id, '')
+                tr_id = str(tr_id)
+                tr_id = tr_id + FSM.SEP + ' '*(5-len(tr_id))
+                tr_str = FSM.SEP.join([str(s_id), str(e_id),
+                                       self.input_set[i], self.output_set[o]])
+                if token != '':
+                    tr_str = tr_str + '  ' + FSM.SEP + ' ' + token
+                fn.write(tr_id + ' ' + tr_str + '\n')
+
+
+    def __materialise_transitions(self):
+        """
+        The function builds the transition objects from the compiled tables
+        in the order of their IDs and links them to their states in bulk.
+        """
+        out_trans = [[] for _ in self.states]
+        in_trans = [[] for _ in self.states]
+        transitions = []
+        rows = self.__transition_rows()
+
+        #  The cyclic garbage collector would repeatedly scan the millions
+        #  of new objects of a large machine while none of them is garbage.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for tr_id, s_id, e_id, code, o in rows:
+                trx = transition.Transition(
+                    tr_id,
+                    self.states[s_id],
+                    self.states[e_id],
+                    self.input_set[code],
+                    self.output_set[o],
+                    self.transition_tokens.get(tr_id, ''))
+                out_trans[s_id].append(trx)
+                in_trans[e_id].append(trx)
+                transitions.append(trx)
+
+            for s in self.states:
+                s.add_out_transitions(out_trans[s.id])
+                s.add_in_transitions(in_trans[s.id])
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        return tuple(transitions)
 
 
     def __generate_random_fsm(self, save_enabled):
@@ -91,95 +392,57 @@ class FSM:
         self.set_current_state(0)
 
 
-    def __create_trans(self, info):
-        try:
-            tr_id, start_s_id, end_s_id, i, o, t = info
-            t = t.strip()
-        except:
-            tr_id, start_s_id, end_s_id, i, o = info
-            t = ''
-
-        tr_id = int(tr_id)
-        start_s_id = int(start_s_id)
-        end_s_id = int(end_s_id)
-
-        start_s = False
-        end_s = False
-
-        for s in self.states:
-            if s.id == start_s_id:
-                start_s = s
-            if s.id == end_s_id:
-                end_s = s
-            if start_s and end_s:
-                break
-
-        
-        trx = transition.Transition(tr_id,
-                                    start_s,
-                                    end_s,
-                                    i,
-                                    o,
-                                    t)
-        start_s.add_out_transition(trx)
-        end_s.add_in_transition(trx)
-        return trx
-
-
     def __randomise_trans_symmetric(self, settings, save_enabled):
-        tr_id = 0
-        transitions = []
-        for s_start in self.states:
-            indexes = list(range(len(self.states)))
-            for i in self.input_set:
-                while indexes:
-                    random.shuffle(indexes)
-                    s_end_id = indexes[0]
-                    s_end = self.states[s_end_id]
-
-                    if s_end.get_in_degree() < len(self.input_set):
-                        pos = random.randint(0, len(self.output_set)-1)
-                        o = self.output_set[pos]
-                        trx = transition.Transition(tr_id,
-                                                    s_start,
-                                                    s_end,
-                                                    i, o, '')
-                        s_start.add_out_transition(trx)
-                        s_end.add_in_transition(trx)
-                        transitions.append(trx)
-                        tr_id = tr_id + 1
-                        break
-                    else:
-                        indexes.remove(s_end_id)
+        """
+        The function produces a random FSM whose digraph is symmetric, i.e.,
+        every state has the in-degree and out-degree of the input size. Each
+        state offers one input slot per input; a random permutation of all
+        slots assigns the end states of the transitions in O(N*|I|).
+        """
+        rng = np.random.default_rng(settings.get('Seed'))
+        num_of_inputs = len(self.input_set)
+        num_of_trans = self.num_of_states * num_of_inputs
+
+        slots = np.repeat(np.arange(self.num_of_states, dtype=np.int32),
+                          num_of_inputs)
+        end_states = rng.permutation(slots)
+        outputs = rng.integers(0, len(self.output_set), size=num_of_trans,
+                               dtype=np.int32)
+
+        self.__init_tables()
+        self.next_state_table[:-1] = end_states.reshape(-1, num_of_inputs)
+        self.output_table[:-1] = outputs.reshape(-1, num_of_inputs)
+        self.transition_id_table[:-1] = np.arange(
+            num_of_trans, dtype=np.int32).reshape(-1, num_of_inputs)
+        self.num_of_transitions = num_of_trans
 
-        self.transitions = tuple(transitions)
         if save_enabled:
             self.save_fsm('symmetric', settings)
 
 
     def set_init_state(self, init_s=0):
-        if isinstance(init_s, type(state.State())):
+        if isinstance(init_s, state.State):
             self.init_state = init_s
             return self.init_state.id
 
         #  If current_s is a state ID.
-        for s in self.states:
-            if s.id == init_s:
-                self.init_state = s
-                return self.current_state
+        s = self.get_state(init_s)
+        if s is not None:
+            self.init_state = s
+            return self.current_state
 
 
     def set_current_state(self, current_s=0):
         #  If current_s is a state object
-        if isinstance(current_s, type(state.State())):
+        if isinstance(current_s, state.State):
             self.current_state = current_s
             return self.current_state.id
 
         #  If current_s is a state ID.
-        for s in self.states:
-            if s.id == current_s:
-                self.current_state = s
-                return self.current_state
+        s = self.get_state(current_s)
+        if s is not None:
+            self.current_state = s
+            return self.current_state
 
 
     def reset(self):
@@ -191,21 +454,27 @@ class FSM:
 
 
     def get_state(self, s_id):
-        for s in self.states:
-            if s.id == s_id:
-                return s
+        #  State IDs are assigned as indexes when the states are created.
+        if 0 <= s_id < len(self.states):
+            return self.states[s_id]
         return None
 
 
     def trigger_trx(self, i):
-        for trx in self.current_state.out_trans:
-            if i == trx.input:
-                self.set_current_state(trx.end_state)
-                return trx.output
+        code = self.input_codes.get(i)
+        if code is None:
+            self.current_state = FSM.ERROR_STATE
+            return None
 
-        #  An error state with id = -1
-        self.set_current_state(state.State())
-        return None
+        s_id = self.current_state.id
+        s_next = self.next_state_table[s_id, code]
+        if s_next == -1:
+            #  The shared error state with id = -1
+            self.current_state = FSM.ERROR_STATE
+            return None
+
+        self.current_state = self.states[s_next]
+        return self.output_set[self.output_table[s_id, code]]
 
 
     def trigger_trxs(self, inputs):
@@ -222,11 +491,77 @@ class FSM:
         return copy.deepcopy(self)
 
 
+    def cursor(self, init_s=0):
+        """
+        The function returns a cursor on this FSM that starts from the state
+        init_s. Cursors share the FSM, so they are cheap to create and copy.
+        """
+        if isinstance(init_s, state.State):
+            init_s = init_s.id
+        return cursor.FSMCursor(self, init_s)
+
+
     def is_minimal(self):
-        return True
+        blocks = minimisation.equivalence_blocks(self)
+        return int(blocks.max(initial=-1)) + 1 == self.num_of_states
+
+
+    def minimise(self):
+        """
+        The function returns the quotient FSM where each state stands for a
+        class of equivalent states of this FSM. States in a class with more
+        than one member can never have UIOs. The original state IDs of each
+        state are kept in state_blocks.
+        """
+        blocks = minimisation.equivalence_blocks(self)
+        num_of_blocks = int(blocks.max(initial=-1)) + 1
+        #  The first state of each block is its representative.
+        reps = np.unique(blocks, return_index=True)[1]
+
+        m = FSM.__new__(FSM)
+        m.__init_attributes(self.parms)
+        m.num_of_states = num_of_blocks
+        m.input_set = self.input_set
+        m.output_set = self.output_set
+        m.__init_tables()
+
+        next_states = self.next_state_table[reps]
+        defined = next_states != -1
+        m.next_state_table[:-1] = np.where(defined,
+                                           blocks[next_states], -1)
+        m.output_table[:-1] = self.output_table[reps]
+        m.transition_id_table[:-1] = self.transition_id_table[reps]
+        m.transition_tokens = self.transition_tokens
+        m.num_of_transitions = int(np.count_nonzero(defined))
+
+        m.state_blocks = tuple([] for _ in range(num_of_blocks))
+        for s_id, b in enumerate(blocks.tolist()):
+            m.state_blocks[b].append(s_id)
+        m.state_blocks = tuple(tuple(b) for b in m.state_blocks)
+
+        m.__create_states([self.states[r].token for r in reps])
+        return m
+
+
+    def original_state_id(self, s_id):
+        """
+        The function maps a state ID of a minimised FSM back to the state it
+        stands for. It returns None if the state stands for several
+        equivalent states.
+        """
+        if self.state_blocks is None:
+            return s_id
+        block = self.state_blocks[s_id]
+        if len(block) != 1:
+            return None
+        return block[0]
 
 
     def save_fsm(self, shape, settings):
+        format_options = settings.get('SaveFormatOptions', ['text'])
+        save_format = format_options[settings.get('SaveFormatSelection', 0)]
+        ext = FSM.BINARY_EXT if save_format == 'binary' else '.txt'
+
         gen_file_name = self.parms['GeneralFileName']
         fsm_name = [gen_file_name, 'fsm', 'states',
                     (str(self.num_of_states)).zfill(10), shape]
@@ -237,27 +572,19 @@ class FSM:
 
         suffix = random.randint(10, 99)
         full_name = (os.path.join(*(fsm_dir+[fsm_name])) +
-                     '_' + str(suffix) + '.txt')
+                     '_' + str(suffix) + ext)
 
         while os.path.exists(full_name):
             suffix = random.randint(10, 99)
             full_name = (os.path.join(*(fsm_dir+[fsm_name])) +
-                     '_' + str(suffix) + '.txt')
-
-        tmp = sys.stdout
-        with open(full_name, 'w') as f:
-            sys.stdout = f
-            print('states:', self.num_of_states)
-            print('input_set'+FSM.SEP, *','.join(self.input_set))
-            print('output_set'+FSM.SEP, *','.join(self.output_set))
-            print('')
-            for tr in self.transitions:
-                tr_id = str(tr.id)
-                tr_id = tr_id + FSM.SEP + ' '*(5-len(tr_id))
-                tr_str = '%d?%d?%s?%s' % (tr.start_state.id, tr.end_state.id, tr.input, tr.output)
-                tr_str = tr_str.replace('?', FSM.SEP)
-                print(tr_id, tr_str)
-        sys.stdout = tmp
+                     '_' + str(suffix) + ext)
+
+        if save_format == 'binary':
+            self.save_binary(full_name)
+        else:
+            self.save_text(full_name)
+
+        return full_name
 
 
     def print_info(self, printing=False):
@@ -0,0 +1,114 @@
+"""
+Hopcroft's partition refinement for the (partial) Mealy machines defined by
+the compiled FSM tables. An undefined transition is treated as moving to an
+absorbing sink state with no output, which is how an FSM behaves when it
+enters its error state.
+"""
+import numpy as np
+
+
+def equivalence_blocks(fsm):
+    """
+    The function partitions the states of an FSM into classes of equivalent
+    states in O(|T| log N). It returns an array that maps each state ID to
+    its block ID, where blocks are numbered in the order of their smallest
+    state IDs.
+    """
+    n = fsm.num_of_states
+    num_of_inputs = len(fsm.input_set)
+
+    #  The sink takes the index n, the error row of the tables.
+    next_states = np.array(fsm.next_state_table, dtype=np.int64)
+    next_states[next_states == -1] = n
+
+    #  Inverse transitions in CSR form: for input a and target t, the
+    #  sources are preds[a][starts[a][t]:starts[a][t+1]].
+    preds = []
+    starts = []
+    for a in range(num_of_inputs):
+        order = np.argsort(next_states[:, a], kind='stable')
+        counts = np.bincount(next_states[:, a], minlength=n+1)
+        preds.append(order.tolist())
+        starts.append([0] + np.cumsum(counts).tolist())
+
+    #  The initial partition groups states by their outputs on all inputs.
+    signatures = {}
+    block_of = []
+    for row in fsm.output_table.tolist():
+        block_of.append(signatures.setdefault(tuple(row), len(signatures)))
+
+    #  Refinable partition: the members of block b are
+    #  elems[first[b]:end[b]] and loc[s] is the position of s in elems.
+    elems = sorted(range(n+1), key=lambda s: block_of[s])
+    loc = [0] * (n+1)
+    for k, s in enumerate(elems):
+        loc[s] = k
+    first = [0] * len(signatures)
+    end = [0] * len(signatures)
+    for k, s in enumerate(elems):
+        b = block_of[s]
+        if end[b] == 0:
+            first[b] = k
+        end[b] = k + 1
+    marked = [0] * len(signatures)
+
+    #  All blocks but the largest one are splitters for every input.
+    largest = max(range(len(first)), key=lambda b: end[b] - first[b])
+    waiting = [(b, a) for b in range(len(first)) if b != largest
+               for a in range(num_of_inputs)]
+    in_waiting = set(waiting)
+
+    while waiting:
+        splitter = waiting.pop()
+        in_waiting.discard(splitter)
+        c, a = splitter
+        pred = preds[a]
+        start = starts[a]
+
+        #  Mark every predecessor of the splitter by moving it to the front
+        #  of its block.
+        touched = []
+        for t in elems[first[c]:end[c]]:
+            for s in pred[start[t]:start[t+1]]:
+                b = block_of[s]
+                if marked[b] == 0:
+                    touched.append(b)
+                k = first[b] + marked[b]
+                u = elems[k]
+                elems[k], elems[loc[s]] = s, u
+                loc[u], loc[s] = loc[s], k
+                marked[b] = marked[b] + 1
+
+        for b in touched:
+            count = marked[b]
+            marked[b] = 0
+            if count == end[b] - first[b]:
+                continue
+
+            #  The marked part becomes a new block.
+            b_new = len(first)
+            first.append(first[b])
+            end.append(first[b] + count)
+            marked.append(0)
+            first[b] = first[b] + count
+            for s in elems[first[b_new]:end[b_new]]:
+                block_of[s] = b_new
+
+            for a2 in range(num_of_inputs):
+                if (b, a2) in in_waiting:
+                    waiting.append((b_new, a2))
+                    in_waiting.add((b_new, a2))
+                else:
+                    if end[b_new] - first[b_new] <= end[b] - first[b]:
+                        smaller = (b_new, a2)
+                    else:
+                        smaller = (b, a2)
+                    waiting.append(smaller)
+                    in_waiting.add(smaller)
+
+    #  Renumber the blocks in the order of their smallest state IDs.
+    numbering = {}
+    blocks = np.empty(n, dtype=np.int32)
+    for s in range(n):
+        blocks[s] = numbering.setdefault(block_of[s], len(numbering))
+    return blocks
@@ -22,6 +22,14 @@ class State:
         self.in_trans = tuple(self.in_trans)
 
 
+    def add_out_transitions(self, trs):
+        self.out_trans = self.out_trans + tuple(trs)
+
+
+    def add_in_transitions(self, trs):
+        self.in_trans = self.in_trans + tuple(trs)
+
+
     def get_in_degree(self):
         return len(self.in_trans)
 
@@ -1,18 +1,26 @@
 import random
 import copy
 import threading
+import numpy as np
+from ..sst import population_kernel
+from . import population
 
 
 class GA:
+    #  A batched tournament samples at most this many candidates at once,
+    #  a block of tournaments at a time.
+    TOURNAMENT_BLOCK_SIZE = 1 << 22
+
     def __init__(self, fsm, sst, parms={}):
         self.fsm = fsm
         self.sst = sst
         self.parms = parms
         self.splitting_rule = None
         self.chromosome_length = -1
+        self.layer_bases = []
 
-        self.population_buffers = ([], [])
-        self.active_pop = -1
+        self.population = None
+        self.rng = None
 
         sel = self.parms['GA']['SelectionOperator']
         self.selection = eval('self.'+self.parms['GASelectMethods'][sel])
@@ -48,19 +56,18 @@ class GA:
 
     def __individual_init(self, id_):
         """
-        Initialise a single chromosome and insert it to populations.
+        Initialise a single chromosome and insert it to the active
+        population.
         """
-        inputs = list(self.fsm.input_set)
+        inputs = list(range(len(self.fsm.input_set)))
         inputs = inputs * self.chromosome_length
 
         for _ in range(5):
             random.shuffle(inputs)
 
-        inputs = ''.join(inputs[:self.chromosome_length])
-        self.population_buffers[0][id_] = (self.parms["ChromosomeAttributes"],
-                                           inputs)
-        self.population_buffers[1][id_] = (self.parms["ChromosomeAttributes"],
-                                           ' '*self.chromosome_length)
+        #  A chromosome is a row of input codes in the genome matrix.
+        self.population.genomes[self.population.active, id_] = (
+            inputs[:self.chromosome_length])
 
 
     def __instantiate(self):
@@ -74,11 +81,21 @@ class GA:
         i = self.parms['GA']['TreeInputRule']
         self.splitting_rule = eval(self.parms['SSTLayerInputRules'][i])
 
+        #  A layer has at most one node per state and node j only reads
+        #  input j of its block, so inputs beyond the number of states are
+        #  never read. A sparse genome leaves them out, which keeps the
+        #  chromosome length linear in MaxUIOLength for deep layers.
+        if self.parms['GA']['SparseGenomeEnabled']:
+            rule = self.splitting_rule
+            max_base = self.fsm.num_of_states
+            self.splitting_rule = lambda x: min(rule(x), max_base)
+
         base = [1]
         for _ in range(self.parms['MaxUIOLength']-1):
             base.append(self.splitting_rule(base[-1]))
 
         #  Calculate the chromosome length based upon SST splitting rule.
+        self.layer_bases = base
         self.chromosome_length = sum(base)
 
         #  Extract Selection, XOver and Mutation operators
@@ -91,11 +108,18 @@ class GA:
         sel = self.parms['GA']['MutationOperator']
         self.mutation = eval('self.'+self.parms['GAMutationMethods'][sel])
 
+        #  Extract the SST construction method
+        sel = self.parms['SST']['ConstructionMethod']
+        self.produce_ssts = eval('self.' +
+                                 self.parms['SSTConstructionMethods'][sel])
+        self.population_kernel = population_kernel.PopulationKernel(
+            self.sst, self.splitting_rule)
+
         #  Initialise population
         pop_size = self.parms['GA']['PopulationSize']
-        for _ in range(pop_size):
-            self.population_buffers[0].append('')
-            self.population_buffers[1].append('')
+        self.population = population.Population(pop_size,
+                                                self.chromosome_length,
+                                                self.fsm.input_dtype)
 
         #  ------------------------------------------------------------
         #  Parallise init
@@ -108,16 +132,13 @@ class GA:
             for i in range(pop_size):
                 self.__individual_init(i)
 
-        #  Set the active population to index 0.
-        self.active_pop = 0
-
 
     def get_target_pop(self):
         """
         Based upon the current active population index, the function returns
         the index for the target population.
         """
-        return (self.active_pop + 1) % 2
+        return self.population.target()
 
 
     def update_active_pop(self):
@@ -125,19 +146,37 @@ class GA:
         This function swaps between GA active population and the target
         population. It works as a pendulum
         """
-        self.active_pop = (self.active_pop + 1) % 2
+        self.population.swap()
 
 
     def produce_single_sst(self, id_):
         """
         The function produces an SST based upon the input sequence.
         """
-        ind_attr, inputs = self.population_buffers[self.active_pop][id_]
-        sst = self.sst.copy()
-        sst.expand_layers(inputs, rule=self.splitting_rule)
-        attr = copy.deepcopy(ind_attr)
-        attr['sst'] = sst
-        self.population_buffers[self.active_pop][id_] = (attr, inputs)
+        pop = self.population
+        inputs = pop.genomes[pop.active, id_]
+        lineage = pop.lineages[pop.active][id_]
+
+        #  An individual that still has its SST has not changed since it
+        #  was evaluated. An offspring re-expands the SST of its parent from
+        #  the first layer its changes affect.
+        if pop.ssts[pop.active][id_] is not None:
+            sst = pop.ssts[pop.active][id_]
+        elif self.parms['SST']['SummaryEnabled']:
+            #  Only a summary of the SST is kept, which cannot be expanded
+            #  again. The population kernel builds it for this individual
+            #  alone without building the tree.
+            sst = self.population_kernel.expand_population(
+                inputs[None, :])[0]
+        elif lineage is not None:
+            parent_sst, position = lineage
+            sst = parent_sst.copy()
+            sst.expand_layers_from(inputs, position, rule=self.splitting_rule)
+        else:
+            sst = self.sst.copy()
+            sst.expand_layers(inputs, rule=self.splitting_rule)
+
+        pop.set_sst(id_, sst)
 
 
     def produce_all_ssts(self):
@@ -151,13 +190,25 @@ class GA:
 
 
 
+    def produce_all_ssts_batched(self):
+        """
+        The function expands the SSTs of the whole population at once with
+        the population kernel, which gives a summary of each SST.
+        """
+        pop = self.population
+        summaries = self.population_kernel.expand_population(
+            pop.genomes[pop.active])
+
+        for i, sst in enumerate(summaries):
+            pop.set_sst(i, sst)
+
+
     def evaluate_fitness_by_one(self, i, fitness_eval, scaling_enabled):
-        ind = self.population_buffers[self.active_pop][i]
-        attr = copy.deepcopy(ind[0])
-        fitness, scaled_fitness = fitness_eval.eval_sst(attr, scaling_enabled)
-        attr['fitness'] = fitness
-        attr['scaled_fitness'] = scaled_fitness
-        self.population_buffers[self.active_pop][i] = (attr, ind[1])
+        pop = self.population
+        fitness, scaled_fitness = fitness_eval.eval_sst(
+            pop.ssts[pop.active][i], scaling_enabled)
+        pop.fitness[pop.active, i] = fitness
+        pop.scaled_fitness[pop.active, i] = scaled_fitness
 
 
     def evaluate_all_fitness(self, fitness_eval):
@@ -176,7 +227,7 @@ class GA:
         if self.parms['DebugEnabled']:
                 print("Evaluate all fitnesses: Start single thread")
 
-        pop_size = len(self.population_buffers[self.active_pop])
+        pop_size = len(self.population)
         for i in range(pop_size):
             self.evaluate_fitness_by_one(i,
                                          fitness_eval,
@@ -187,16 +238,14 @@ class GA:
         """
         Normalise individual fitness to the range [0, 1]
         """
-        ind = self.population_buffers[self.active_pop][i]
-        #  Be careful! If not using copy(), a reference is passed!
-        attr = copy.deepcopy(ind[0])
-        attr['scaled_fitness'] = attr['scaled_fitness'] / s
-        self.population_buffers[self.active_pop][i] = (attr, ind[1])
+        pop = self.population
+        pop.scaled_fitness[pop.active, i] = (
+            pop.scaled_fitness[pop.active, i] / s)
 
 
     def normalise_all_fitness(self):
-        s = sum([ind[0]['scaled_fitness']
-                 for ind in self.population_buffers[self.active_pop]])
+        pop = self.population
+        s = sum(pop.scaled_fitness[pop.active].tolist())
 
         if self.parms['ParallelismEnabled']:
             args = (s, )
@@ -204,24 +253,22 @@ class GA:
                                               args)
         if self.parms['DebugEnabled']:
                 print("Normalisation: Start single thread")
-        pop_size = len(self.population_buffers[self.active_pop])
-        for i in range(pop_size):
-            self.normalise_fitness_by_one(i, s)
+        pop.scaled_fitness[pop.active] = pop.scaled_fitness[pop.active] / s
 
 
 
     def selection_rws_by_one(self, id_, target_pop):
         fitness_acc = 0
         threhold_val = random.random()        
-        pop_size = len(self.population_buffers[target_pop])
+        pop = self.population
+        pop_size = len(pop)
 
         while True:
             i = random.randint(0, pop_size-1)
-            s_ind = self.population_buffers[self.active_pop][i]
 
-            fitness_acc = fitness_acc + s_ind[0]['scaled_fitness']
+            fitness_acc = fitness_acc + pop.scaled_fitness[pop.active, i]
             if fitness_acc > threhold_val:
-                self.population_buffers[target_pop][id_] = copy.deepcopy(s_ind)
+                pop.copy_individual(i, id_)
                 break
 
 
@@ -234,33 +281,87 @@ class GA:
         else:
             if self.parms['DebugEnabled']:
                 print("RWS Selection: Start single thread")
-            for i in range(len(self.population_buffers[target_pop])):
+            for i in range(len(self.population)):
                 self.selection_rws_by_one(i, target_pop)
 
         self.update_active_pop()
 
 
+    def cumulative_fitness(self):
+        """
+        The function returns the cumulative scaled fitness of the active
+        population, built once per generation for proportional selection.
+        Negative values count as zero, and a population without any fitness
+        is selected uniformly.
+        """
+        pop = self.population
+        weights = np.maximum(pop.scaled_fitness[pop.active], 0)
+        if not weights.any():
+            weights = np.ones(len(pop))
+        return np.cumsum(weights)
+
+
+    def select_by_wheel(self, cumulative, points):
+        """
+        The function selects, for each point on the wheel of cumulative
+        fitness, the individual whose slot holds it, by binary search.
+        """
+        picks = np.searchsorted(cumulative, points, side='right')
+        #  Rounding may put a point at the very end of the wheel.
+        picks = np.minimum(picks, len(cumulative)-1)
+
+        pop_size = len(self.population)
+        self.population.copy_individuals(picks, np.arange(pop_size))
+        self.update_active_pop()
+
+
+    def selection_rws_cumulative(self):
+        """
+        Roulette wheel selection proportional to the scaled fitness. All
+        picks are drawn at once, each found by binary search in the
+        cumulative fitness, so a pick costs O(log P).
+        """
+        cumulative = self.cumulative_fitness()
+        points = self.batch_rng().random(len(self.population)) * cumulative[-1]
+        self.select_by_wheel(cumulative, points)
+
+
+    def selection_sus(self):
+        """
+        Stochastic universal sampling: P equally spaced points on the wheel
+        of cumulative fitness, from one random offset. Each individual is
+        selected in proportion to its scaled fitness, with less spread than
+        independent roulette wheel picks.
+        """
+        pop_size = len(self.population)
+        cumulative = self.cumulative_fitness()
+        spacing = cumulative[-1] / pop_size
+        points = (self.batch_rng().random() + np.arange(pop_size)) * spacing
+        self.select_by_wheel(cumulative, points)
+
+
     def selection_ts_by_one(self, id_, target_pop, ts_portion):
         """
         Tournament selectin for a single candidate. It randomly chooses a
         portion of candidates from the population and selects the best for
         the next generation.
         """
-        pop_size = len(self.population_buffers[target_pop])
-        portion_size = int(ts_portion * pop_size)
+        pop_size = len(self.population)
+        #  A tournament has at least one candidate.
+        portion_size = max(1, int(ts_portion * pop_size))
 
+        pop = self.population
         candidate = None
 
         # This can be further parallised with parallely sampling candidates
         for _ in range(portion_size):
             i = random.randint(0, pop_size-1)
             if candidate is None:
-                candidate = self.population_buffers[self.active_pop][i]
-            else:
-                ind = self.population_buffers[self.active_pop][i]
-                if ind[0]['scaled_fitness'] > candidate[0]['scaled_fitness']:
-                    candidate = ind
-        self.population_buffers[target_pop][id_] = copy.deepcopy(candidate)
+                candidate = i
+            elif (pop.scaled_fitness[pop.active, i] >
+                  pop.scaled_fitness[pop.active, candidate]):
+                candidate = i
+        pop.copy_individual(candidate, id_)
 
 
     def selection_ts(self):
@@ -278,32 +379,57 @@ class GA:
         else:
             if self.parms['DebugEnabled']:
                 print("TS Selection: Start single thread")
-            for i in range(len(self.population_buffers[target_pop])):
+            for i in range(len(self.population)):
                 self.selection_ts_by_one(i, target_pop, portion)
 
         self.update_active_pop()
 
 
+    def selection_ts_batched(self):
+        """
+        Tournament selection over the whole population at once. The
+        candidates of all tournaments are sampled as a matrix with one row
+        per tournament, and the winner of a row is the first candidate with
+        the highest scaled fitness, as in selection_ts.
+        """
+        pop = self.population
+        pop_size = len(pop)
+        rng = self.batch_rng()
+        portion = self.parms['GA']['TS_SelectionPortion']
+        portion_size = max(1, int(portion * pop_size))
+        fitness = pop.scaled_fitness[pop.active]
+
+        winners = np.empty(pop_size, dtype=np.intp)
+        block = max(1, GA.TOURNAMENT_BLOCK_SIZE // portion_size)
+        for start in range(0, pop_size, block):
+            stop = min(start + block, pop_size)
+            candidates = rng.integers(0, pop_size,
+                                      (stop - start, portion_size))
+            best = np.argmax(fitness[candidates], axis=1)
+            winners[start:stop] = candidates[np.arange(stop - start), best]
+
+        pop.copy_individuals(winners, np.arange(pop_size))
+        self.update_active_pop()
+
+
     def xover_single_by_one(self, id_, target_pop):
         cutting = random.randint(1, self.chromosome_length-1)
-        c_id_1 = random.randint(0, len(self.population_buffers[target_pop])-1)
+        c_id_1 = random.randint(0, len(self.population)-1)
         c_id_2 = c_id_1
 
         while c_id_2 == c_id_1:
             c_id_2 = random.randint(0,
-                                    len(self.population_buffers[target_pop])-1)
+                                    len(self.population)-1)
 
-        c1 = self.population_buffers[self.active_pop][c_id_1][1]
-        c2 = self.population_buffers[self.active_pop][c_id_2][1]
+        pop = self.population
+        c1 = pop.genomes[pop.active, c_id_1]
+        c2 = pop.genomes[pop.active, c_id_2]
         
-        c_new_1 = c1[:cutting] + c2[cutting:]
-        c_new_2 = c2[:cutting] + c1[cutting:]
-
-        ind_1 = (self.parms["ChromosomeAttributes"], c_new_1)
-        ind_2 = (self.parms["ChromosomeAttributes"], c_new_2)
+        c_new_1 = np.concatenate((c1[:cutting], c2[cutting:]))
+        c_new_2 = np.concatenate((c2[:cutting], c1[cutting:]))
 
-        self.population_buffers[target_pop][id_] = ind_1
-        self.population_buffers[target_pop][id_+1] = ind_2
+        pop.set_offspring(id_, c_new_1, c_id_1)
+        pop.set_offspring(id_+1, c_new_2, c_id_2)
 
 
     def xover_single(self):
@@ -318,7 +444,7 @@ class GA:
         else:
             if self.parms['DebugEnabled']:
                 print("Single XOver: Start single thread")
-            for i in range(0, len(self.population_buffers[target_pop]), 2):
+            for i in range(0, len(self.population), 2):
                 self.xover_single_by_one(i, target_pop)
 
         self.update_active_pop()
@@ -330,34 +456,34 @@ class GA:
         cuttings = cuttings[:self.parms['GA']['MultipleXOverPoints']]
         cuttings.sort()
         
-        c_id_1 = random.randint(0, len(self.population_buffers[target_pop])-1)
+        c_id_1 = random.randint(0, len(self.population)-1)
         c_id_2 = c_id_1
 
         while c_id_2 == c_id_1:
             c_id_2 = random.randint(0,
-                                    len(self.population_buffers[target_pop])-1)
-        c_new_1 = ''
-        c_new_2 = ''
+                                    len(self.population)-1)
+        c_new_1 = []
+        c_new_2 = []
 
-        candidates = [self.population_buffers[self.active_pop][c_id_1][1],
-                      self.population_buffers[self.active_pop][c_id_2][1]]
+        pop = self.population
+        candidates = [pop.genomes[pop.active, c_id_1],
+                      pop.genomes[pop.active, c_id_2]]
 
         start = 0
         turn = 0
 
         cuttings.append(self.chromosome_length+1)
-        while cuttings:
-            point, *cuttings = cuttings
-            c_new_1 = c_new_1 + candidates[turn][start:point]
-            c_new_2 = c_new_2 + candidates[(turn+1)%2][start:point]
+        for point in cuttings:
+            c_new_1.append(candidates[turn][start:point])
+            c_new_2.append(candidates[(turn+1)%2][start:point])
             start = point
             turn = (turn + 1) % 2
 
-        ind_1 = (self.parms["ChromosomeAttributes"], c_new_1)
-        ind_2 = (self.parms["ChromosomeAttributes"], c_new_2)
+        c_new_1 = np.concatenate(c_new_1)
+        c_new_2 = np.concatenate(c_new_2)
 
-        self.population_buffers[target_pop][id_] = ind_1
-        self.population_buffers[target_pop][id_+1] = ind_2
+        pop.set_offspring(id_, c_new_1, c_id_1)
+        pop.set_offspring(id_+1, c_new_2, c_id_2)
 
 
     def xover_multiple(self):
@@ -373,35 +499,32 @@ class GA:
         else:
             if self.parms['DebugEnabled']:
                 print("Multiple XOver: Start single thread")
-            for i in range(0, len(self.population_buffers[target_pop]), 2):
+            for i in range(0, len(self.population), 2):
                 self.xover_multiple_by_one(i, target_pop)
 
         self.update_active_pop()
 
 
     def xover_uniform_by_one(self, id_, target_pop):
-        l = len(self.population_buffers[target_pop])
+        l = len(self.population)
         c_id_1 = random.randint(0, l-1)
         c_id_2 = c_id_1
 
         while c_id_2 == c_id_1:
             c_id_2 = random.randint(0, l-1)
 
-        c1 = list(self.population_buffers[self.active_pop][c_id_1][1])
-        c2 = list(self.population_buffers[self.active_pop][c_id_2][1])
+        pop = self.population
+        c1 = pop.genomes[pop.active, c_id_1]
+        c2 = pop.genomes[pop.active, c_id_2]
 
         masks = [random.randint(0, 1) for _ in range(self.chromosome_length)]
-        
-        c_new_1 = [c1[i] if not masks[i] else c2[i]
-                       for i in range(self.chromosome_length)]
-        c_new_2 = [c1[i] if masks[i] else c2[i]
-                       for i in range(self.chromosome_length)]
+        masks = np.array(masks, dtype=bool)
 
-        ind_1 = (self.parms["ChromosomeAttributes"], ''.join(c_new_1))
-        ind_2 = (self.parms["ChromosomeAttributes"], ''.join(c_new_2))
+        c_new_1 = np.where(masks, c2, c1)
+        c_new_2 = np.where(masks, c1, c2)
 
-        self.population_buffers[target_pop][id_] = ind_1
-        self.population_buffers[target_pop][id_+1] = ind_2
+        pop.set_offspring(id_, c_new_1, c_id_1)
+        pop.set_offspring(id_+1, c_new_2, c_id_2)
 
 
     def xover_uniform(self):
@@ -413,26 +536,116 @@ class GA:
             if self.parms['DebugEnabled']:
                 print("Uniform XOver: Start single thread")
 
-            for i in range(0, len(self.population_buffers[target_pop]), 2):
+            for i in range(0, len(self.population), 2):
                 self.xover_uniform_by_one(i, target_pop)
 
         self.update_active_pop()
 
 
+    def batch_rng(self):
+        """
+        The function returns the numpy generator of the batched operators.
+        It is seeded from random on first use, so a seeded run stays
+        reproducible, and the other operators draw the same random numbers
+        as without it.
+        """
+        if self.rng is None:
+            self.rng = np.random.default_rng(random.getrandbits(64))
+        return self.rng
+
+
+    def xover_batched(self, masks):
+        """
+        The function draws a pair of distinct parents for each row of masks
+        and writes their two children next to each other in the target
+        population. A child takes the inputs of its own parent, except at
+        the positions where the mask of its pair is set, where it takes
+        those of the other parent.
+        """
+        pop = self.population
+        pop_size = len(pop)
+        num_of_pairs = len(masks)
+        rng = self.batch_rng()
+
+        p1 = rng.integers(0, pop_size, num_of_pairs)
+        p2 = (p1 + rng.integers(1, pop_size, num_of_pairs)) % pop_size
+
+        g1 = pop.genomes[pop.active, p1]
+        g2 = pop.genomes[pop.active, p2]
+        children = np.empty((2*num_of_pairs, self.chromosome_length),
+                            dtype=g1.dtype)
+        children[0::2] = np.where(masks, g2, g1)
+        children[1::2] = np.where(masks, g1, g2)
+        parents = np.empty(2*num_of_pairs, dtype=np.intp)
+        parents[0::2] = p1
+        parents[1::2] = p2
+
+        #  The last pair of an odd population only gives one child.
+        pop.set_offsprings(np.arange(pop_size), children[:pop_size],
+                           parents[:pop_size])
+
+        self.update_active_pop()
+
+
+    def xover_single_batched(self):
+        """
+        Single point crossover over the whole population at once, with one
+        cutting point betwen [1, length-1] for each pair of parents.
+        """
+        num_of_pairs = (len(self.population) + 1) // 2
+        cuttings = self.batch_rng().integers(1, self.chromosome_length,
+                                             num_of_pairs)
+        masks = np.arange(self.chromosome_length) >= cuttings[:, None]
+        self.xover_batched(masks)
+
+
+    def xover_multiple_batched(self):
+        """
+        Multiple point crossover over the whole population at once. Each
+        pair of parents has its own set of distinct cutting points betwen
+        [1, length-1], and the children swap parents after every odd
+        number of them.
+        """
+        num_of_pairs = (len(self.population) + 1) // 2
+        length = self.chromosome_length
+        points = min(self.parms['GA']['MultipleXOverPoints'], length-1)
+
+        #  The smallest of a row of random keys pick its cutting points.
+        keys = self.batch_rng().random((num_of_pairs, length-1))
+        cuttings = np.argpartition(keys, points-1, axis=1)[:, :points] + 1
+
+        marks = np.zeros((num_of_pairs, length), dtype=np.int8)
+        marks[np.arange(num_of_pairs)[:, None], cuttings] = 1
+        masks = np.cumsum(marks, axis=1, dtype=np.intp) % 2 == 1
+        self.xover_batched(masks)
+
+
+    def xover_uniform_batched(self):
+        """
+        Uniform crossover over the whole population at once, with a random
+        mask for each pair of parents.
+        """
+        num_of_pairs = (len(self.population) + 1) // 2
+        masks = self.batch_rng().integers(
+            0, 2, (num_of_pairs, self.chromosome_length)).astype(bool)
+        self.xover_batched(masks)
+
+
     def mutate_bitwise_by_one(self, id_, target_pop):
         threshold = random.random()
-        ind = self.population_buffers[self.active_pop][id_]
+        pop = self.population
+        ind = pop.genomes[pop.active, id_]
 
         if threshold > self.parms['GA']['MRate']:
-            self.population_buffers[target_pop][id_] = copy.deepcopy(ind)
+            pop.copy_individual(id_, id_)
         else:
             mut_i = random.randint(0, self.chromosome_length-1)
-            candidates = list(self.fsm.input_set)
-            candidates.remove(ind[1][mut_i])
+            candidates = list(range(len(self.fsm.input_set)))
+            candidates.remove(ind[mut_i])
             random.shuffle(candidates)
-            input_str = ind[1][:mut_i] + candidates[0] + ind[1][mut_i+1:]
-            self.population_buffers[target_pop][id_] = (
-                (self.parms["ChromosomeAttributes"], input_str))
+            inputs = ind.copy()
+            inputs[mut_i] = candidates[0]
+            pop.set_offspring(id_, inputs, id_)
 
 
     def mutate_bitwise(self):
@@ -444,7 +657,7 @@ class GA:
             if self.parms['DebugEnabled']:
                 print("Bitwise Mutation: Start single thread")
 
-            for i in range(len(self.population_buffers[target_pop])):
+            for i in range(len(self.population)):
                 self.mutate_bitwise_by_one(i, target_pop)
 
         self.update_active_pop()        
@@ -452,21 +665,23 @@ class GA:
 
     def mutate_torus_by_one(self, id_, target_pop, base, settings):
         threshold = random.random()
-        ind = self.population_buffers[self.active_pop][id_]
+        pop = self.population
         
         if threshold > self.parms['GA']['MRate']:
-            self.population_buffers[target_pop][id_] = copy.deepcopy(ind)
+            pop.copy_individual(id_, id_)
         else:
             f_mut = settings['MutateFunc']
             degree = settings['Degree']
 
+            #  Blocks are laid out one after another, so a block starts at
+            #  the sum of the bases before it.
             mut_p = random.randint(1, len(base)-1)
-            start_point = base[mut_p] - 1
-            end_point = 2 * base[mut_p] - 1
+            start_point = sum(base[:mut_p])
+            end_point = start_point + base[mut_p]
 
-            ind = self.population_buffers[self.active_pop][id_]
-            ind_org_substr = ind[1][start_point:end_point]
-            ind_mut_substr = list(ind_org_substr)
+            ind = pop.genomes[pop.active, id_]
+            ind_org_substr = ind[start_point:end_point]
+            ind_mut_substr = ind_org_substr.tolist()
 
             # f_mut supports shuffle of a list. In such a case, the return is
             # None with the input list being shuffled.
@@ -475,19 +690,14 @@ class GA:
                 if v is not None:
                     ind_mut_substr = v[:]
 
-            ind_mut_substr = ''.join(ind_mut_substr)
-            ind_str_mut = (ind[1][:start_point] +
-                           ind_mut_substr +
-                           ind[1][end_point:])
-            self.population_buffers[target_pop][id_] = (
-                (self.parms["ChromosomeAttributes"], ind_str_mut))
+            ind_mut = ind.copy()
+            ind_mut[start_point:end_point] = ind_mut_substr
+            pop.set_offspring(id_, ind_mut, id_)
 
 
     def mutate_torus(self):
         # print("  ... mutate_torus")
-        base = [1]
-        for _ in range(self.parms['MaxUIOLength']-1):
-            base.append(self.splitting_rule(base[-1]))
+        base = self.layer_bases
 
         rules = self.parms["LayerBasedMutationRules"]
         sel = self.parms["GA"]["MutationOperatorRule"]
@@ -505,12 +715,88 @@ class GA:
         else:
             if self.parms['DebugEnabled']:
                 print("Torus Mutation: Start single thread")
-            for i in range(len(self.population_buffers[target_pop])):
+            for i in range(len(self.population)):
                 self.mutate_torus_by_one(i, target_pop, base, settings)
 
         self.update_active_pop()
 
 
+    def mutation_mask(self):
+        """
+        The function draws the individuals to mutate, each with probability
+        MRate, and copies the others to the target population. It returns
+        the positions of the individuals to mutate.
+        """
+        pop = self.population
+        draws = self.batch_rng().random(len(pop))
+        mutated = draws <= self.parms['GA']['MRate']
+
+        kept = np.flatnonzero(~mutated)
+        pop.copy_individuals(kept, kept)
+
+        return np.flatnonzero(mutated)
+
+
+    def mutate_bitwise_batched(self):
+        """
+        Bitwise mutation over the whole population at once. A mutated
+        individual has one input, at a random position, replaced by one of
+        the other inputs at random.
+        """
+        pop = self.population
+        rng = self.batch_rng()
+        mutated = self.mutation_mask()
+
+        inputs = pop.genomes[pop.active, mutated]
+        rows = np.arange(len(mutated))
+        positions = rng.integers(0, self.chromosome_length, len(mutated))
+
+        #  Adding 1 to |I|-1 modulo |I| gives every other input code with
+        #  the same probability.
+        num_of_inputs = len(self.fsm.input_set)
+        shifts = rng.integers(1, num_of_inputs, len(mutated))
+        inputs[rows, positions] = ((inputs[rows, positions] + shifts) %
+                                   num_of_inputs)
+
+        pop.set_offsprings(mutated, inputs, mutated)
+        self.update_active_pop()
+
+
+    def mutate_torus_batched(self):
+        """
+        Torus mutation over the whole population at once. A mutated
+        individual has the block of a random layer, other than the first,
+        changed by the batched layer-based mutation rule. The blocks of all
+        individuals that draw the same layer are changed together, as the
+        rows of one matrix.
+        """
+        pop = self.population
+        rng = self.batch_rng()
+        mutated = self.mutation_mask()
+
+        rules = self.parms["BatchedLayerMutationRules"]
+        sel = self.parms["GA"]["MutationOperatorRule"]
+        f_mut = eval(rules[sel])
+        degree = self.parms["GA"]["MutationOperatorDegree"]
+
+        base = self.layer_bases
+        layers = rng.integers(1, len(base), len(mutated))
+        inputs = pop.genomes[pop.active, mutated]
+
+        for p in np.unique(layers).tolist():
+            rows = np.flatnonzero(layers == p)
+            start_point = sum(base[:p])
+            end_point = start_point + base[p]
+
+            blocks = inputs[rows, start_point:end_point]
+            for _ in range(degree):
+                blocks = f_mut(blocks, rng)
+            inputs[rows, start_point:end_point] = blocks
+
+        pop.set_offsprings(mutated, inputs, mutated)
+        self.update_active_pop()
+
+
     def sd(self, input_a, input_b, fitness_eval, measure=[0]):
         """
         This function measures the Similarity Degree (SD) between two input
@@ -520,7 +806,8 @@ class GA:
         parallelism. When establishing multi-thread based computational model,
         sd is used to pass and store computational results.
         """
-        measure[0] = fitness_eval.similarity(input_a, input_b)
+        measure[0] = fitness_eval.similarity(input_a, input_b,
+                                             self.splitting_rule)
         return measure[0]
 
 
@@ -533,11 +820,12 @@ class GA:
         its ancestors. The more times it has been represented, the higher
         degree it should be downgraded.
         """
-        ind = self.population_buffers[self.active_pop][id_]
+        pop = self.population
+        ind = pop.genomes[pop.active, id_]
 
         #  TODO: can be further parallised here ...
         for i in range(id_):
-            ind_prv = self.population_buffers[self.active_pop][i]
+            ind_prv = pop.genomes[pop.active, i]
             # -----------------------------------------------------
             #       The following is for parallesim
             # -----------------------------------------------------
@@ -545,12 +833,15 @@ class GA:
             #  self.sd(ind1[1], ind2[1], fitness_eval, m)
             #  m_sd = m[0]
             # -----------------------------------------------------
-            m_sd = self.sd(ind[1], ind_prv[1], fitness_eval)
+            m_sd = self.sd(ind, ind_prv, fitness_eval)
 
             #  If a measurement passes the threshold, then we include it to the
-            #  list of candidates for sharing downgrading.
+            #  candidates for sharing downgrading, of which only the largest
+            #  and the number of them are kept.
             if m_sd > self.parms['GA']['SimilarityThreshold']:
-                ind[0]['sharing_factors'].append(m_sd)
+                pop.sharing_max[pop.active, id_] = max(
+                    pop.sharing_max[pop.active, id_], m_sd)
+                pop.sharing_counts[pop.active, id_] += 1
 
 
     def sharing(self, fitness_eval):
@@ -568,16 +859,15 @@ class GA:
             for i in range(1, self.parms['GA']['PopulationSize']):
                 self.sharing_by_one(i, fitness_eval)
 
-        #  If sharing_factors list is not empty, then the individual's fitness
-        #  is first downgraded by the max factor and then divided by the number
-        #  of times this candidate has been represented by its ancestors.
-
-        
-        for ind in self.population_buffers[self.active_pop]:
-            if ind[0]['sharing_factors'] != []:
-                max_factor = max(ind[0]['sharing_factors'])
-                ind[0]['fitness'] = (((1 - max_factor) * ind[0]['fitness']) /
-                                     len(ind[0]['sharing_factors']))
+        #  If an individual has sharing factors, then its fitness is first
+        #  downgraded by the max factor and then divided by the number of
+        #  times this candidate has been represented by its ancestors.
+        pop = self.population
+        shared = pop.sharing_counts[pop.active] > 0
+        max_factors = pop.sharing_max[pop.active, shared]
+        pop.fitness[pop.active, shared] = (
+            ((1 - max_factors) * pop.fitness[pop.active, shared]) /
+            pop.sharing_counts[pop.active, shared])
 
 
     def collect_uios(self, stat, gen):
@@ -591,12 +881,17 @@ class GA:
         uio_counts = copy.deepcopy(stat.all_targetted_uios)
         all_gen_uios = {}
 
-        for ind in self.population_buffers[self.active_pop]:
-            sst_pattern = ind[0]['sst']
+        for sst_pattern in self.population.ssts[self.population.active]:
             uios.extend(sst_pattern.report_uios())
 
         for uio in uios:
             i, o, s = uio
+            #  UIOs found on a minimised FSM are reported for the original
+            #  states; a state merged with others has no UIO.
+            s = self.fsm.original_state_id(s)
+            if s is None:
+                continue
+
             uio_counts[i] = uio_counts.get(i, 0) + 1
             all_gen_uios[s] = list(set(all_gen_uios.get(s, []) + [(i, o)]))
 
@@ -609,7 +904,9 @@ class GA:
 
 
     def process_individuals(self, fitness_eval, stat, gen=0):
-        self.produce_all_ssts()
+        self.produce_ssts()
+        if self.sst.prefix_cache is not None:
+            self.sst.prefix_cache.record_generation(gen)
 
         #  TODO: need to propose a parallel data structure for collecting UIOs.
         self.collect_uios(stat, gen)
@@ -621,7 +918,9 @@ class GA:
         #  TODO: consider parallising the statistical computations
 
         if self.parms['GA']['StatisticsEnabled']:
-            stat.process(gen, self.population_buffers[self.active_pop])
+            pop = self.population
+            stat.process(gen, pop.fitness[pop.active].tolist(),
+                         pop.ssts[pop.active])
 
         if self.parms['GA']['SharingEnabled']:
             self.sharing(fitness_eval)
@@ -661,15 +960,16 @@ class GA:
 
 
     def __test_display(self):
-        print("Active", self.active_pop)
-        for ind in self.population_buffers[self.active_pop]:
-            print(ind)
+        pop = self.population
+        print("Active", pop.active)
+        for i in range(len(pop)):
+            print(pop.fitness[pop.active, i], pop.genomes[pop.active, i])
 
         print("\n")
 
-        print("Target", self.get_target_pop())
-        for ind in self.population_buffers[self.get_target_pop()]:
-            print(ind)
+        print("Target", pop.target())
+        for i in range(len(pop)):
+            print(pop.fitness[pop.target(), i], pop.genomes[pop.target(), i])
 
         print("-"*30)
         print()
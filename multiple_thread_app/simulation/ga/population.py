@@ -0,0 +1,129 @@
+import numpy as np
+
+
+class Population:
+    """
+    A GA population kept in two buffers: the active population, which the
+    GA reads, and the target population, which the next operator writes.
+    Each buffer holds the chromosomes of all individuals as the rows of a
+    genome matrix, and their fitness values, scaled fitness values and
+    sharing factors in parallel arrays. All of them are allocated once per
+    run. The SST of each individual, and the lineage of an offspring (the
+    SST it is to be expanded from and the first position at which its
+    inputs differ from those of that SST), are kept in lists alongside.
+
+    Swapping the buffers only swaps the index of the active one, like a
+    pendulum.
+    """
+    def __init__(self, size, length, dtype):
+        self.size = size
+        self.length = length
+        self.genomes = np.zeros((2, size, length), dtype=dtype)
+        self.fitness = np.full((2, size), -1.0)
+        self.scaled_fitness = np.full((2, size), -1.0)
+
+        #  Sharing only needs the largest factor of an individual and the
+        #  number of its factors.
+        self.sharing_max = np.zeros((2, size))
+        self.sharing_counts = np.zeros((2, size), dtype=np.intp)
+
+        self.ssts = ([None] * size, [None] * size)
+        self.lineages = ([None] * size, [None] * size)
+        self.active = 0
+
+
+    def target(self):
+        """
+        The function returns the index of the target population.
+        """
+        return (self.active + 1) % 2
+
+
+    def swap(self):
+        self.active = self.target()
+
+
+    def copy_individual(self, i, j):
+        """
+        The function copies individual i of the active population to
+        position j of the target population.
+        """
+        self.copy_individuals(np.array([i]), np.array([j]))
+
+
+    def copy_individuals(self, ids, targets):
+        """
+        The function copies the individuals at positions ids of the active
+        population to positions targets of the target population.
+        """
+        a = self.active
+        t = self.target()
+        self.genomes[t, targets] = self.genomes[a, ids]
+        self.fitness[t, targets] = self.fitness[a, ids]
+        self.scaled_fitness[t, targets] = self.scaled_fitness[a, ids]
+        self.sharing_max[t, targets] = self.sharing_max[a, ids]
+        self.sharing_counts[t, targets] = self.sharing_counts[a, ids]
+
+        #  SSTs are never changed once they are built, so they are shared.
+        for i, j in zip(ids.tolist(), targets.tolist()):
+            self.ssts[t][j] = self.ssts[a][i]
+            self.lineages[t][j] = self.lineages[a][i]
+
+
+    def set_offspring(self, j, inputs, parent):
+        """
+        The function writes an offspring of individual parent of the active
+        population, with the given inputs, to position j of the target
+        population.
+        """
+        self.set_offsprings(np.array([j]), np.asarray(inputs)[None, :],
+                            np.array([parent]))
+
+
+    def set_offsprings(self, ids, inputs, parents):
+        """
+        The function writes the offspring in the rows of inputs to positions
+        ids of the target population, where the parent of each is given in
+        parents as an index of the active population. An offspring keeps
+        the SST of its parent, or of the ancestor the parent is to be
+        expanded from, together with the first position at which its
+        inputs differ from those of that SST.
+        """
+        a = self.active
+        t = self.target()
+
+        changes = inputs != self.genomes[a, parents]
+        positions = np.where(changes.any(axis=1), changes.argmax(axis=1),
+                             self.length)
+
+        for j, parent, position in zip(ids.tolist(), parents.tolist(),
+                                       positions.tolist()):
+            if self.ssts[a][parent] is not None:
+                lineage = (self.ssts[a][parent], position)
+            elif self.lineages[a][parent] is not None:
+                parent_sst, parent_position = self.lineages[a][parent]
+                lineage = (parent_sst, min(position, parent_position))
+            else:
+                lineage = None
+
+            self.ssts[t][j] = None
+            self.lineages[t][j] = lineage
+
+        self.genomes[t, ids] = inputs
+        self.fitness[t, ids] = -1
+        self.scaled_fitness[t, ids] = -1
+        self.sharing_max[t, ids] = 0
+        self.sharing_counts[t, ids] = 0
+
+
+    def set_sst(self, i, sst):
+        """
+        The function saves the SST of individual i of the active population,
+        which no longer needs its lineage.
+        """
+        self.ssts[self.active][i] = sst
+        self.lineages[self.active][i] = None
+
+
+    def __len__(self):
+        return self.size
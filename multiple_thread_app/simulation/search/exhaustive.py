@@ -0,0 +1,87 @@
+class ExhaustiveSearch:
+    """
+    An exact alternative to the GA: a breadth-first search over all input
+    sequences of at most MaxUIOLength inputs. Each frontier node carries the
+    partition of the states induced by its input sequence, i.e., blocks of
+    states that have produced the same outputs. A state that ends up alone
+    in its block has the node's input sequence as a UIO. Blocks that can
+    never split again (singletons, or all states in the same current state)
+    are dropped, and so is a node without any blocks left.
+    """
+    def __init__(self, fsm, parms={}):
+        self.fsm = fsm
+        self.parms = parms
+        self.next_states = fsm.next_state_table.tolist()
+        self.outputs = fsm.output_table.tolist()
+
+
+    def split_block(self, block, i):
+        """
+        A block is a tuple of (output codes, initial state IDs, current
+        state IDs). The function splits it by the outputs on input code i.
+        """
+        outputs, init_ids, current_ids = block
+        groups = {}
+        for s_init, s in zip(init_ids, current_ids):
+            #  The error state -1 addresses the last row of the tables.
+            o = self.outputs[s][i]
+            if o not in groups:
+                groups[o] = ([], [])
+            groups[o][0].append(s_init)
+            groups[o][1].append(self.next_states[s][i])
+
+        return [(outputs + (o,), inits, currents)
+                for o, (inits, currents) in groups.items()]
+
+
+    def expand_node(self, node, i):
+        """
+        The function applies input code i to a frontier node and returns the
+        new node, if any block of it may still split, together with the
+        UIOs it has discovered.
+        """
+        inputs, blocks = node
+        inputs = inputs + (i,)
+        uios = []
+        new_blocks = []
+
+        for block in blocks:
+            for outputs, inits, currents in self.split_block(block, i):
+                if len(inits) == 1:
+                    if currents[0] != -1:
+                        uios.append((inputs, outputs, inits[0]))
+                elif len(set(currents)) > 1:
+                    new_blocks.append((outputs, inits, currents))
+
+        if new_blocks == []:
+            return None, uios
+
+        return (inputs, new_blocks), uios
+
+
+    def collect_uios(self, stat, uios):
+        for inputs, outputs, s in uios:
+            s = self.fsm.original_state_id(s)
+            if s is None:
+                continue
+            i = self.fsm.decode_inputs(inputs)
+            o = self.fsm.decode_outputs(outputs)
+            stat.all_discovered_uios[s] = list(
+                set(stat.all_discovered_uios.get(s, []) + [(i, o)]))
+
+
+    def start(self, stat):
+        states = [s.id for s in self.fsm.states]
+        frontier = []
+        if len(states) > 1:
+            frontier.append(((), [((), states, states)]))
+
+        for _ in range(self.parms['MaxUIOLength']):
+            new_frontier = []
+            for node in frontier:
+                for i in range(len(self.fsm.input_set)):
+                    new_node, uios = self.expand_node(node, i)
+                    self.collect_uios(stat, uios)
+                    if new_node is not None:
+                        new_frontier.append(new_node)
+            frontier = new_frontier
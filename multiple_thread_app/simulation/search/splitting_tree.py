@@ -0,0 +1,282 @@
+class SplittingNode:
+    """
+    A node of the splitting tree. An internal node keeps its sigma
+    implicitly: the first input, and the node next whose sigma follows it,
+    or None if the input alone splits the block by its outputs.
+    """
+    __slots__ = ('block', 'input', 'next', 'parent', 'children', 'depth')
+
+    def __init__(self, block, parent=None):
+        self.block = block
+        self.input = None
+        self.next = None
+        self.parent = parent
+        self.children = []
+        self.depth = 0 if parent is None else parent.depth + 1
+
+
+class SplittingTree:
+    """
+    A Lee-Yannakakis splitting tree built on the FSM transition tables. Each
+    internal node holds a block of states and an input sequence sigma that
+    splits the block by outputs without merging any two of its states. The
+    tree exists if and only if the FSM has an adaptive distinguishing
+    sequence (ADS); the ADS then gives a UIO for every state.
+
+    Sigmas are never run. A node splits its block either by the outputs on
+    its input, or by the child of its next node that each state moves to,
+    which every state reads off its path from the root. Each internal node
+    costs O((p + log n)·m) for the m states of its block and p inputs, so
+    the build takes O((p + log n)·n·h) for a tree of height h. That is
+    close to O(p·n log n) when blocks split evenly, but O(p·n^2) on
+    chain-like machines where each split peels off a few states; the
+    O(p·n log n) bound of Lee and Yannakakis needs Hopcroft's smaller-half
+    refinement on top.
+
+    The method needs a complete and reduced FSM. Undefined transitions are
+    treated as moving to an absorbing error state with no output, which is
+    then added to the states being split. As in the SST and the exhaustive
+    search, a path that enters the error state is not a UIO, so a state
+    whose path needs an undefined transition is reported without one.
+    """
+    def __init__(self, fsm, parms={}):
+        self.fsm = fsm
+        self.parms = parms
+
+        #  The error state takes the index N, the error row of the tables.
+        self.sink = fsm.num_of_states
+        self.next_states = fsm.next_state_table.tolist()
+        self.next_states = [[self.sink if s == -1 else s for s in row]
+                            for row in self.next_states]
+        self.outputs = fsm.output_table.tolist()
+        self.num_of_inputs = len(fsm.input_set)
+
+        self.root = None
+        #  The nodes from the root down to the leaf of each state.
+        self.paths = []
+
+
+    def lca(self, states):
+        """
+        The function returns the deepest node whose block holds all the
+        given states. Two paths agree from the root down to the node where
+        they part, so each is compared with the first one by bisection.
+        """
+        first = self.paths[states[0]]
+        depth = len(first) - 1
+        for s in states[1:]:
+            path = self.paths[s]
+            low, high = 0, min(depth, len(path) - 1)
+            while low < high:
+                mid = (low + high + 1) // 2
+                if path[mid] is first[mid]:
+                    low = mid
+                else:
+                    high = mid - 1
+            depth = low
+        return first[depth]
+
+
+    def sigma(self, node):
+        """
+        The function spells out the input sequence of an internal node.
+        """
+        inputs = []
+        while node is not None:
+            inputs.append(node.input)
+            node = node.next
+        return tuple(inputs)
+
+
+    def __valid(self, block, i):
+        """
+        An input is valid for a block if it does not merge two of its
+        states, i.e., no two states produce the same output and move to the
+        same state.
+        """
+        moves = {(self.outputs[s][i], self.next_states[s][i]) for s in block}
+        return len(moves) == len(block)
+
+
+    def __find_sigma(self, node):
+        block = node.block
+        for i in range(self.num_of_inputs):
+            if not self.__valid(block, i):
+                continue
+
+            #  (a) A valid input that splits the block by its outputs.
+            if len({self.outputs[s][i] for s in block}) > 1:
+                node.input = i
+                return True
+
+            #  (b) A valid input that moves the block into states that are
+            #  already split by the tree.
+            images = [self.next_states[s][i] for s in block]
+            if len({self.paths[s][-1] for s in images}) > 1:
+                node.input = i
+                node.next = self.lca(images)
+                return True
+
+        return False
+
+
+    def __split(self, node):
+        """
+        The function splits the block of a node whose sigma is known. The
+        next node, if any, must be split already.
+        """
+        i = node.input
+        if node.next is None:
+            keys = [self.outputs[s][i] for s in node.block]
+        else:
+            depth = node.next.depth + 1
+            keys = [self.paths[self.next_states[s][i]][depth]
+                    for s in node.block]
+
+        groups = {}
+        for s, key in zip(node.block, keys):
+            groups.setdefault(key, []).append(s)
+
+        for block in groups.values():
+            child = SplittingNode(block, node)
+            node.children.append(child)
+            for s in block:
+                self.paths[s].append(child)
+
+
+    def build(self):
+        """
+        The function builds the splitting tree and returns True, or returns
+        False if the FSM has no adaptive distinguishing sequence.
+        """
+        states = list(range(self.fsm.num_of_states))
+        if any(self.sink in row for row in self.next_states):
+            states.append(self.sink)
+        self.root = SplittingNode(states)
+        self.paths = [[self.root] for _ in range(self.sink + 1)]
+
+        #  Leaves still to be split, by the size of their blocks.
+        leaves = {}
+        if len(states) > 1:
+            leaves[len(states)] = [self.root]
+
+        while leaves:
+            #  Each round splits all the leaves of the largest size.
+            rounds = leaves.pop(max(leaves))
+
+            order = []
+            pending = []
+            for n in rounds:
+                if self.__find_sigma(n):
+                    order.append(n)
+                else:
+                    pending.append(n)
+
+            #  (c) A valid input that moves the block onto the block of
+            #  another node of this round. The node takes its sigma after
+            #  that one, so sigmas are handed on from the nodes of (a) and
+            #  (b) outwards.
+            by_block = {frozenset(n.block): n for n in rounds}
+            waiting = {}
+            for n in pending:
+                for i in range(self.num_of_inputs):
+                    if not self.__valid(n.block, i):
+                        continue
+                    images = frozenset(self.next_states[s][i]
+                                       for s in n.block)
+                    m = by_block.get(images)
+                    if m is not None and m is not n:
+                        waiting.setdefault(m, []).append((n, i))
+
+            k = 0
+            while k < len(order):
+                for n, i in waiting.get(order[k], []):
+                    if n.input is None:
+                        n.input = i
+                        n.next = order[k]
+                        order.append(n)
+                k = k + 1
+
+            if len(order) < len(rounds):
+                return False
+
+            for n in order:
+                self.__split(n)
+                for child in n.children:
+                    if len(child.block) > 1:
+                        leaves.setdefault(len(child.block), []).append(child)
+
+        return True
+
+
+    def adaptive_uios(self):
+        """
+        The function follows the adaptive distinguishing sequence from all
+        states at once and returns, for every state, the inputs and outputs
+        along its path, which form a UIO. States that have produced the same
+        outputs so far are kept together, and each group takes the first
+        input of the sigma of the lowest node that holds its current states.
+        A group is done once a single state is left in it. A path that
+        enters the error state produces no output there and is left out.
+        The splitting tree must be built.
+        """
+        uios = {}
+        states = list(range(self.fsm.num_of_states))
+        stack = [((), (), states, states)]
+
+        while stack:
+            inputs, outputs, inits, currents = stack.pop()
+            if len(inits) == 1:
+                if inputs != ():
+                    uios[inits[0]] = (inputs, outputs)
+                continue
+
+            i = self.lca(currents).input
+            groups = {}
+            for s_init, s in zip(inits, currents):
+                o = self.outputs[s][i]
+                if o not in groups:
+                    groups[o] = ([], [])
+                groups[o][0].append(s_init)
+                groups[o][1].append(self.next_states[s][i])
+
+            for o, (group_inits, group_currents) in groups.items():
+                if o != -1:
+                    stack.append((inputs + (i, ), outputs + (o, ),
+                                  group_inits, group_currents))
+
+        return uios
+
+
+    def start(self, stat):
+        """
+        The function reports a UIO for every state into the statistics in
+        the same form as the GA. The UIOs are not bounded by MaxUIOLength.
+        States whose path needs an undefined transition are added to the
+        states without UIOs. Whether the FSM has an adaptive distinguishing
+        sequence is recorded in the statistics and returned.
+        """
+        stat.ads_found = self.build()
+        if not stat.ads_found:
+            return False
+
+        uios = self.adaptive_uios()
+        for s, (inputs, outputs) in uios.items():
+            s = self.fsm.original_state_id(s)
+            if s is None:
+                continue
+            i = self.fsm.decode_inputs(inputs)
+            o = self.fsm.decode_outputs(outputs)
+            stat.all_discovered_uios[s] = list(
+                set(stat.all_discovered_uios.get(s, []) + [(i, o)]))
+
+        #  A single state needs no inputs to be told apart.
+        missing = [s for s in range(self.fsm.num_of_states)
+                   if s not in uios and self.fsm.num_of_states > 1]
+        missing = [self.fsm.original_state_id(s) for s in missing]
+        missing = [s for s in missing if s is not None]
+        if missing != []:
+            known = stat.states_without_uios or []
+            stat.states_without_uios = sorted(set(known) | set(missing))
+
+        return True
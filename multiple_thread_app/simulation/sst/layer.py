@@ -8,16 +8,18 @@ class Layer:
         return len(self.nodes)
 
 
+    def number_of_states(self):
+        """
+        The number of FSM copies held by the nodes of the layer.
+        """
+        return sum(len(n.current_ids) for n in self.nodes)
+
+
     def number_of_discrete_nodes(self):
         nodes = [n for n in self.nodes if n.is_discrete()]
         return len(nodes)
 
 
-    def reset(self):
-        for n in self.nodes:
-            n.reset_fsm()
-
-
     def report_uios(self):
         uios = []
         for n in self.nodes:
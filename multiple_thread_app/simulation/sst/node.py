@@ -1,23 +1,90 @@
+import numpy as np
+
+
 class Node:
-    def __init__(self, layer_id, id_=0):
+    """
+    A node keeps its FSM copies as two arrays of state IDs, the initial and
+    the current state of each copy, on the FSM that all copies share. It
+    only keeps the input code that split it from its parent and the output
+    code it produced. Its input and output labels are rebuilt from the
+    parent pointers, and its traces are built when they are read, unless
+    trace_splitting() has built them eagerly.
+    """
+    def __init__(self, layer_id, id_=0, input_=None, output=None,
+                 parent=None, fsm=None, init_ids=None, current_ids=None):
         self.id = id_
         self.layer_id = layer_id
-        self.fsm_copies = []
-        self.input_labels = []
-        self.output_labels = []
-        self.parent = None
-        self.children = []
-        self.traces = []
+        self.fsm = fsm
+        if init_ids is None:
+            init_ids = np.zeros(0, dtype=np.int32)
+        if current_ids is None:
+            current_ids = init_ids
+        self.init_ids = init_ids
+        self.current_ids = current_ids
+        self.input = input_
+        self.output = output
+        self.parent = parent
+        self.eager_traces = None
         self.sep = '.'
 
 
-    def trace_splitting(self):
+    @property
+    def fsm_copies(self):
+        """
+        The FSM copies of the node as cursors, which are only created when
+        they are read.
+        """
+        copies = []
+        for s_init, s in zip(self.init_ids.tolist(),
+                             self.current_ids.tolist()):
+            m = self.fsm.cursor(s_init)
+            m.set_current_state(s)
+            copies.append(m)
+        return copies
+
+
+    @property
+    def input_labels(self):
+        return self.__labels(lambda n: n.input)
+
+
+    @property
+    def output_labels(self):
+        return self.__labels(lambda n: n.output)
+
+
+    def __labels(self, label):
+        labels = []
+        n = self
+        while n.parent is not None:
+            labels.append(label(n))
+            n = n.parent
+        return labels[::-1]
+
+
+    @property
+    def traces(self):
+        if self.eager_traces is not None:
+            return self.eager_traces
+        return self.__build_traces()
+
+
+    def __build_traces(self):
+        traces = []
         for fsm in self.fsm_copies:
             if fsm.current_state.id != -1:
-                self.traces.append(str(fsm.init_state)+' -> ' +
-                                   str(fsm.current_state))
+                traces.append(str(fsm.init_state)+' -> ' +
+                              str(fsm.current_state))
             else:
-                self.traces.append(str(fsm.init_state)+' -> ERR')
+                traces.append(str(fsm.init_state)+' -> ERR')
+        return traces
+
+
+    def trace_splitting(self):
+        """
+        Build the traces of the node eagerly, for debugging.
+        """
+        self.eager_traces = self.__build_traces()
 
 
     def splitable(self):
@@ -34,7 +101,7 @@ class Node:
 
 
     def is_discrete(self):
-        if len(self.fsm_copies) != 1:
+        if len(self.current_ids) != 1:
             return False
 
         if self.is_dummy_node():
@@ -44,48 +111,39 @@ class Node:
 
 
     def is_dummy_node(self):
-        if len(self.fsm_copies) == 0:
+        if len(self.current_ids) == 0:
             return True
 
-        if self.fsm_copies[0].current_state.id == -1:
+        if self.current_ids[0] == -1:
             return True
 
         return False
 
 
     def is_stuck_node(self):
-        s = None
-        count = 1
-        for m in self.fsm_copies:
-            if s is None:
-                s = m.current_state
-            else:
-                if m.current_state.id == s.id:
-                    count = count + 1
-                s = m.current_state
-        return len(self.fsm_copies) == count
-                
-
-    def reset_fsm(self):
-        for m in self.fsm_copies:
-            m.reset()
+        if len(self.current_ids) == 0:
+            return False
+        return self.current_ids.min() == self.current_ids.max()
 
 
     def report_uio(self):
         if not self.is_discrete():
             return None
 
-        uio = (''.join(self.input_labels),
-               ''.join(self.output_labels),
-               self.fsm_copies[0].init_state.id)
+        uio = (self.fsm.decode_inputs(self.input_labels),
+               self.fsm.decode_outputs(self.output_labels),
+               int(self.init_ids[0]))
 
         return uio
 
 
     def __str__(self):
+        inputs = [self.fsm.input_set[i] for i in self.input_labels]
+        outputs = [self.fsm.output_set[o] if o != -1 else str(None)
+                   for o in self.output_labels]
         info = ['Layer ' + str(self.layer_id) + ' : Node: ' + str(self.id),
-                'Inputs:  ' + self.sep.join(self.input_labels),
-                'Outputs:  ' + self.sep.join(self.output_labels),
+                'Inputs:  ' + self.sep.join(inputs),
+                'Outputs:  ' + self.sep.join(outputs),
                 '- FSM Copies -']
 
         info.extend(['  M(From -> To): ' + trace for trace in self.traces])
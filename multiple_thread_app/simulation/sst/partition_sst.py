@@ -0,0 +1,242 @@
+import numpy as np
+from . import sst_base
+
+
+class PartitionLayer:
+    """
+    A layer of a PartitionSST keeps its nodes in flat arrays instead of
+    Node objects. The states of node k are at positions
+    offsets[k]:offsets[k+1] of init_ids and current_ids. Node k was split
+    from node parents[k] of the previous layer by input inputs[k], on
+    which it produced output outputs[k]. The input and output labels of a
+    node are rebuilt by following the parents up to the top layer.
+    """
+    def __init__(self, id_, init_ids, current_ids, offsets,
+                 parents, inputs, outputs, prev=None):
+        self.id = id_
+        self.init_ids = init_ids
+        self.current_ids = current_ids
+        self.offsets = offsets
+        self.parents = parents
+        self.inputs = inputs
+        self.outputs = outputs
+        self.prev = prev
+
+
+    def number_of_nodes(self):
+        return len(self.offsets) - 1
+
+
+    def number_of_states(self):
+        return len(self.current_ids)
+
+
+    def discrete_nodes(self):
+        """
+        A node is discrete if it holds a single state that is not in the
+        error state.
+        """
+        firsts = self.offsets[:-1]
+        sizes = self.offsets[1:] - firsts
+        return np.nonzero((sizes == 1) &
+                          (self.current_ids[firsts] != -1))[0]
+
+
+    def number_of_discrete_nodes(self):
+        return len(self.discrete_nodes())
+
+
+    def splitable_nodes(self):
+        """
+        A node can be split unless it is a dummy node (in the error state),
+        a discrete node or a stuck node (all states in the same state). A
+        node of one state is stuck as well.
+        """
+        firsts = self.offsets[:-1]
+        lows = np.minimum.reduceat(self.current_ids, firsts)
+        highs = np.maximum.reduceat(self.current_ids, firsts)
+        return (self.current_ids[firsts] != -1) & (lows != highs)
+
+
+    def labels(self, k):
+        inputs = []
+        outputs = []
+        layer = self
+        while layer.prev is not None:
+            inputs.append(int(layer.inputs[k]))
+            outputs.append(int(layer.outputs[k]))
+            k = layer.parents[k]
+            layer = layer.prev
+        return inputs[::-1], outputs[::-1]
+
+
+    def node_states(self, k):
+        start, stop = self.offsets[k], self.offsets[k+1]
+        return (self.init_ids[start:stop].tolist(),
+                self.current_ids[start:stop].tolist())
+
+
+    def report_uios(self, fsm):
+        uios = []
+        for k in self.discrete_nodes().tolist():
+            inputs, outputs = self.labels(k)
+            uios.append((fsm.decode_inputs(inputs),
+                         fsm.decode_outputs(outputs),
+                         int(self.init_ids[self.offsets[k]])))
+        return uios
+
+
+    def node_str(self, fsm, k, id_):
+        inputs, outputs = self.labels(k)
+        inputs = [fsm.input_set[i] for i in inputs]
+        outputs = [fsm.output_set[o] if o != -1 else str(None)
+                   for o in outputs]
+        info = ['Layer ' + str(self.id) + ' : Node: ' + str(id_),
+                'Inputs:  ' + '.'.join(inputs),
+                'Outputs:  ' + '.'.join(outputs),
+                '- FSM Copies -']
+
+        for s_init, s in zip(*self.node_states(k)):
+            if s != -1:
+                trace = str(fsm.states[s_init]) + ' -> ' + str(fsm.states[s])
+            else:
+                trace = str(fsm.states[s_init]) + ' -> ERR'
+            info.append('  M(From -> To): ' + trace)
+
+        info.append('')
+
+        return '\n'.join(info)
+
+
+    def to_str(self, fsm):
+        info = ['Layer: ' + str(self.id)]
+        #  As in an SST, nodes are numbered among their siblings.
+        id_ = 0
+        for k in range(self.number_of_nodes()):
+            if k > 0 and self.parents[k] == self.parents[k-1]:
+                id_ = id_ + 1
+            else:
+                id_ = 0
+            info.append(self.node_str(fsm, k, id_))
+        info.append('')
+        return '\n'.join(info)
+
+
+class PartitionSST(sst_base.SSTBase):
+    """
+    An SST whose nodes are blocks of state IDs rather than lists of FSM
+    cursors. A node holds the initial and the current state IDs of its
+    states, the index of its parent node and its input/output label, all
+    kept in the flat arrays of its layer. It is split in the same way as an
+    SST node and gives the same layers, UIOs and fitness values.
+
+    Layers are never changed once they are built, so copying a
+    PartitionSST only copies its list of layers, and a prefix cache, if
+    given, shares layers among all copies.
+    """
+    def __init__(self, fsm=None, distinguishability=None, max_depth=None,
+                 prefix_cache=None):
+        self.fsm = fsm
+        self.distinguishability = distinguishability
+        self.max_depth = max_depth
+        self.prefix_cache = prefix_cache
+        self.layers = []
+
+        self.__init_top_layer()
+
+
+    def __init_top_layer(self):
+        if self.fsm is None:
+            raise ValueError('FSM is None')
+
+        states = np.array([s.id for s in self.fsm.states], dtype=np.int32)
+        layer0 = PartitionLayer(0, states, states.copy(),
+                                np.array([0, len(states)], dtype=np.intp),
+                                np.array([-1], dtype=np.intp),
+                                np.array([-1], dtype=np.int32),
+                                np.array([-1], dtype=np.int32))
+        self.layers.append(layer0)
+
+        return layer0
+
+
+    def expand_layer(self, inputs):
+        """
+        The function splits all the nodes of the last layer at once. As in
+        an SST, node k takes input code inputs[k % len(inputs)], and
+        children are ordered by their parents and then by the first
+        appearance of their outputs.
+        """
+        if len(inputs) == 0:
+            raise ValueError('Input = ' + str(inputs))
+
+        inputs = np.asarray(inputs, dtype=np.intp)
+        current_layer = self.layers[-1]
+        num_of_nodes = current_layer.number_of_nodes()
+        node_inputs = inputs[np.arange(num_of_nodes) % len(inputs)]
+
+        splitable = current_layer.splitable_nodes()
+        if self.distinguishability is not None:
+            depth = self.max_depth - current_layer.id
+            for k in np.nonzero(splitable)[0].tolist():
+                _, currents = current_layer.node_states(k)
+                if not self.distinguishability.separable(currents, depth):
+                    splitable[k] = False
+
+        #  Keep the states of the nodes to split, each with its node index.
+        sizes = np.diff(current_layer.offsets)
+        nodes = np.repeat(np.arange(num_of_nodes), sizes)
+        kept = splitable[nodes]
+        if not kept.any():
+            return False
+        nodes = nodes[kept]
+        init_ids = current_layer.init_ids[kept]
+        current_ids = current_layer.current_ids[kept]
+
+        #  Apply the inputs to all states in one gather. The error state -1
+        #  addresses the last row of the tables.
+        state_inputs = node_inputs[nodes]
+        outputs = self.fsm.output_table[current_ids, state_inputs]
+        current_ids = self.fsm.next_state_table[current_ids, state_inputs]
+
+        #  A child is a (node, output) pair. Children are numbered in the
+        #  order of their first states, which follows the nodes and then
+        #  the first appearance of the outputs within a node.
+        keys = nodes * (len(self.fsm.output_set) + 1) + (outputs + 1)
+        _, firsts, groups = np.unique(keys, return_index=True,
+                                      return_inverse=True)
+        ranks = np.empty(len(firsts), dtype=np.intp)
+        ranks[np.argsort(firsts)] = np.arange(len(firsts))
+        groups = ranks[groups.reshape(-1)]
+        order = np.argsort(groups, kind='stable')
+
+        firsts = np.sort(firsts)
+        offsets = np.zeros(len(firsts)+1, dtype=np.intp)
+        offsets[1:] = np.cumsum(np.bincount(groups))
+
+        layer_x = PartitionLayer(current_layer.id+1,
+                                 init_ids[order],
+                                 current_ids[order],
+                                 offsets,
+                                 nodes[firsts],
+                                 node_inputs[nodes[firsts]].astype(np.int32),
+                                 outputs[firsts].astype(np.int32),
+                                 prev=current_layer)
+        self.layers.append(layer_x)
+
+        return True
+
+
+    def report_uios(self):
+        uios = []
+        for layer in self.layers:
+            uios.extend(layer.report_uios(self.fsm))
+        return uios
+
+
+    def __str__(self):
+        info = []
+        for l in self.layers:
+            info.append(l.to_str(self.fsm))
+        info.append('')
+        return '\n'.join(info)
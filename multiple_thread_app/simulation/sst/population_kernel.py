@@ -0,0 +1,174 @@
+import numpy as np
+from . import summary
+
+
+class PopulationKernel:
+    """
+    The kernel expands the SSTs of a whole population at once, layer by
+    layer, and returns an SSTSummary for each individual. Column j of the
+    (individual, state) matrices follows the FSM copy that starts in state
+    j, with its current state ID and the index of its node in the current
+    layer of its individual (-1 once its node can no longer be split).
+    Each layer applies the input blocks of all individuals with gathers
+    from the transition tables.
+
+    The states of an SST node are always in the order of their initial
+    states, so a node's children are ordered by the smallest initial state
+    that produces each output. The kernel gives the same layers and UIOs
+    as expanding each individual's SST from the template.
+
+    Each layer only keeps the parent, input and output of its nodes, as
+    in an SST, and a matrix holds the node of every copy in the current
+    layer. The labels of a UIO are rebuilt from its node when it is found.
+    """
+    def __init__(self, sst, rule=lambda x: 2*x):
+        self.fsm = sst.fsm
+        self.distinguishability = sst.distinguishability
+        self.max_depth = sst.max_depth
+        self.rule = rule
+
+
+    def expand_population(self, chromosomes):
+        chromosomes = np.asarray(chromosomes, dtype=np.intp)
+        pop_size, length = chromosomes.shape
+        n = self.fsm.num_of_states
+        num_of_outputs = len(self.fsm.output_set)
+
+        summaries = [self.__top_summary() for _ in range(pop_size)]
+
+        current_ids = np.tile(np.arange(n, dtype=np.intp), (pop_size, 1))
+        nodes = np.zeros((pop_size, n), dtype=np.intp)
+        active = np.ones(pop_size, dtype=bool)
+        num_of_nodes = np.ones(pop_size, dtype=np.intp)
+
+        #  The index of the node of every copy among all nodes of the
+        #  current layer, where the top layer has one node per individual,
+        #  and the (parent index, input, output) of the nodes of each layer.
+        node_ids = np.repeat(np.arange(pop_size), n).reshape(pop_size, n)
+        tree = []
+
+        start = 0
+        base = 1
+        layer_id = 0
+        while start < length and active.any():
+            block = chromosomes[:, start:start+base]
+            start = start + base
+            base = self.rule(base)
+
+            #  Find the nodes that can be split: those whose states are not
+            #  all in the same state, which rules out single states and the
+            #  error state.
+            ind_ids, cols = np.nonzero((nodes >= 0) & active[:, None])
+            keys = ind_ids * n + nodes[ind_ids, cols]
+            currents = current_ids[ind_ids, cols]
+
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            firsts = np.flatnonzero(np.r_[True, sorted_keys[1:] !=
+                                          sorted_keys[:-1]])
+            lows = np.minimum.reduceat(currents[order], firsts)
+            highs = np.maximum.reduceat(currents[order], firsts)
+            splitable = lows != highs
+
+            if self.distinguishability is not None:
+                depth = self.max_depth - layer_id
+                for g in np.flatnonzero(splitable).tolist():
+                    stop = firsts[g+1] if g+1 < len(firsts) else len(order)
+                    ids = currents[order[firsts[g]:stop]]
+                    if not self.distinguishability.separable(ids, depth):
+                        splitable[g] = False
+
+            group_of = np.empty(len(keys), dtype=np.intp)
+            group_of[order] = np.repeat(np.arange(len(firsts)),
+                                        np.diff(np.r_[firsts, len(order)]))
+            kept = splitable[group_of]
+
+            #  Copies in nodes that are not split leave the SST.
+            nodes[ind_ids[~kept], cols[~kept]] = -1
+            ind_ids = ind_ids[kept]
+            cols = cols[kept]
+            parents = keys[kept] - ind_ids * n
+            parent_ids = node_ids[ind_ids, cols]
+
+            #  Node k of an individual takes input block[k % len(block)].
+            inputs = block[ind_ids, parents % block.shape[1]]
+            outputs = self.fsm.output_table[current_ids[ind_ids, cols],
+                                            inputs]
+            current_ids[ind_ids, cols] = self.fsm.next_state_table[
+                current_ids[ind_ids, cols], inputs]
+
+            #  A child is an (individual, parent, output) triple, ordered by
+            #  its parent and then by its smallest initial state.
+            child_keys = ((ind_ids * n + parents) * (num_of_outputs+1) +
+                          outputs + 1)
+            _, child_firsts, children = np.unique(child_keys,
+                                                  return_index=True,
+                                                  return_inverse=True)
+            children = children.reshape(-1)
+            child_order = np.lexsort((cols[child_firsts],
+                                      parents[child_firsts],
+                                      ind_ids[child_firsts]))
+            child_inds = ind_ids[child_firsts][child_order]
+
+            #  Number the children within each individual.
+            new_counts = np.bincount(child_inds, minlength=pop_size)
+            offsets = np.r_[0, np.cumsum(new_counts)[:-1]]
+            numbers = np.empty(len(child_order), dtype=np.intp)
+            numbers[child_order] = (np.arange(len(child_order)) -
+                                    offsets[child_inds])
+            nodes[ind_ids, cols] = numbers[children]
+            node_ids[ind_ids, cols] = children
+            tree.append((parent_ids[child_firsts], inputs[child_firsts],
+                         outputs[child_firsts]))
+
+            #  An individual without any new node stops expanding.
+            active = active & (new_counts > 0)
+            num_of_nodes = new_counts
+            layer_id = layer_id + 1
+
+            sizes = np.bincount(children, minlength=len(child_firsts))
+            discrete = (sizes[children] == 1) & (current_ids[ind_ids,
+                                                             cols] != -1)
+            self.__record_layer(summaries, layer_id, active, num_of_nodes,
+                                ind_ids[discrete], cols[discrete],
+                                nodes[ind_ids[discrete], cols[discrete]],
+                                children[discrete], tree)
+
+        return summaries
+
+
+    def __top_summary(self):
+        sst_summary = summary.SSTSummary()
+        discrete = 1 if self.fsm.num_of_states == 1 else 0
+        sst_summary.layers.append(summary.LayerSummary(0, 1, discrete))
+        if discrete == 1:
+            sst_summary.uios.append(('', '', self.fsm.states[0].id))
+        return sst_summary
+
+
+    def __record_layer(self, summaries, layer_id, active, num_of_nodes,
+                       ind_ids, cols, numbers, node_ids, tree):
+        discrete_counts = np.bincount(ind_ids, minlength=len(summaries))
+        for i in np.flatnonzero(active).tolist():
+            summaries[i].layers.append(
+                summary.LayerSummary(layer_id, int(num_of_nodes[i]),
+                                     int(discrete_counts[i])))
+
+        #  Rebuild the labels of the discrete copies by following the
+        #  parents of their nodes up to the top layer.
+        labels_in = []
+        labels_out = []
+        for parents, inputs, outputs in reversed(tree):
+            labels_in.append(inputs[node_ids])
+            labels_out.append(outputs[node_ids])
+            node_ids = parents[node_ids]
+        labels_in = np.array(labels_in[::-1]).T.tolist()
+        labels_out = np.array(labels_out[::-1]).T.tolist()
+
+        #  The UIOs of an individual are reported in the order of its nodes.
+        for k in np.lexsort((numbers, ind_ids)).tolist():
+            i = int(ind_ids[k])
+            j = int(cols[k])
+            summaries[i].uios.append((self.fsm.decode_inputs(labels_in[k]),
+                                      self.fsm.decode_outputs(labels_out[k]),
+                                      self.fsm.states[j].id))
@@ -0,0 +1,152 @@
+from collections import OrderedDict
+import threading
+
+
+class PrefixNode:
+    __slots__ = ('block', 'parent', 'children', 'layer')
+
+    def __init__(self, block=None, parent=None, layer=None):
+        self.block = block
+        self.parent = parent
+        self.children = {}
+        self.layer = layer
+
+
+class PrefixCache:
+    """
+    A trie of SST layers shared by the SSTs of a population that are
+    copied from the same template. An SST consumes a chromosome in blocks
+    of inputs, one block per layer, so a path of blocks from the root of
+    the trie identifies a layer, which is saved at the end of the path. A
+    layer that could not be expanded is saved as None, as the expansion
+    stops there.
+
+    SST layers are never changed once they are built, so the same layer
+    objects are shared by every SST that reaches them. The memory of a
+    layer grows with the number of FSM copies held by its nodes, so the
+    trie holds layers of at most max_size FSM copies in total, counting a
+    layer that could not be expanded as one. It evicts the least recently
+    used layers, together with the layers below them.
+    """
+    def __init__(self, max_size=1 << 20):
+        if max_size < 1:
+            raise ValueError('Prefix cache size = ' + str(max_size))
+
+        self.max_size = max_size
+        self.size = 0
+        self.root = PrefixNode()
+        #  The trie nodes in LRU order, with the FSM copies of their layers.
+        self.nodes = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.gen_hits = 0
+        self.gen_misses = 0
+        self.gen_statistics = {}
+        self.lock = threading.Lock()
+
+
+    def expand_layer(self, sst, inputs, prefix=None):
+        """
+        The function expands the last layer of an SST with a block of
+        inputs, taking the layer from the trie if it is there. The prefix
+        is the trie node of the last layer, or None for the top layer. It
+        returns whether the SST was expanded and the trie node of the new
+        last layer.
+        """
+        if prefix is None:
+            prefix = self.root
+        block = tuple(int(i) for i in inputs)
+
+        with self.lock:
+            child = prefix.children.get(block)
+            if child is None:
+                self.misses = self.misses + 1
+                self.gen_misses = self.gen_misses + 1
+            else:
+                self.hits = self.hits + 1
+                self.gen_hits = self.gen_hits + 1
+                self.nodes.move_to_end(child)
+
+        if child is not None:
+            if child.layer is None:
+                return False, child
+            sst.layers.append(child.layer)
+            return True, child
+
+        expanded = sst.expand_layer(inputs)
+        layer = sst.layers[-1] if expanded else None
+        child = PrefixNode(block, prefix, layer)
+        size = 1 if layer is None else max(1, layer.number_of_states())
+
+        with self.lock:
+            #  While the lock was released, the prefix may have been evicted
+            #  or another SST may have saved the same layer. A layer is only
+            #  saved where the trie can reach it.
+            if prefix is not self.root and prefix not in self.nodes:
+                return expanded, child
+            saved = prefix.children.get(block)
+            if saved is not None:
+                return expanded, saved
+
+            prefix.children[block] = child
+            self.nodes[child] = size
+            self.size = self.size + size
+            while self.size > self.max_size:
+                oldest, size = self.nodes.popitem(last=False)
+                self.size = self.size - size
+                self.__evict(oldest)
+
+        return expanded, child
+
+
+    def __evict(self, trie_node):
+        if trie_node.parent is not None:
+            trie_node.parent.children.pop(trie_node.block, None)
+            trie_node.parent = None
+
+        nodes = list(trie_node.children.values())
+        trie_node.children = {}
+        while nodes:
+            n = nodes.pop()
+            self.size = self.size - self.nodes.pop(n, 0)
+            nodes.extend(n.children.values())
+            n.children = {}
+
+
+    def record_generation(self, gen):
+        """
+        The function saves the hits and misses of a generation and starts
+        counting for the next one.
+        """
+        self.gen_statistics[gen] = (self.gen_hits, self.gen_misses)
+        self.gen_hits = 0
+        self.gen_misses = 0
+
+
+    def clear(self):
+        with self.lock:
+            self.root = PrefixNode()
+            self.nodes.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+            self.gen_hits = 0
+            self.gen_misses = 0
+            self.gen_statistics = {}
+
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+    def __str__(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups > 0 else 0
+        info = ['Prefix cache: ' + str(len(self.nodes)) + ' layers of ' +
+                str(self.size) + ' FSM copies, ' +
+                str(self.hits) + ' hits, ' + str(self.misses) +
+                ' misses (hit rate ' + '{:.2%}'.format(rate) + ')']
+        for gen, (hits, misses) in sorted(self.gen_statistics.items()):
+            info.append('  Generation ' + str(gen) + ': ' + str(hits) +
+                        ' hits, ' + str(misses) + ' misses')
+        return '\n'.join(info)
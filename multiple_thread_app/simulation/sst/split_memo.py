@@ -0,0 +1,62 @@
+from collections import OrderedDict
+import threading
+
+
+class SplitMemo:
+    """
+    A bounded LRU table of node splits that is shared by all SSTs of a
+    population. A split is keyed on the current state IDs of a node, as the
+    bytes of their array, and the input code applied to it, and maps to the
+    children of the node as (output code, positions of the states in the
+    node, next state IDs).
+    The initial states do not take part, so nodes of different individuals
+    that hold the same current states share an entry.
+    """
+    def __init__(self, max_size=4096):
+        if max_size < 1:
+            raise ValueError('Split memo size = ' + str(max_size))
+
+        self.max_size = max_size
+        self.table = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+
+    def get(self, current_ids, i):
+        key = (current_ids, i)
+        with self.lock:
+            children = self.table.get(key)
+            if children is None:
+                self.misses = self.misses + 1
+            else:
+                self.hits = self.hits + 1
+                self.table.move_to_end(key)
+            return children
+
+
+    def put(self, current_ids, i, children):
+        with self.lock:
+            self.table[(current_ids, i)] = children
+            self.table.move_to_end((current_ids, i))
+            if len(self.table) > self.max_size:
+                self.table.popitem(last=False)
+
+
+    def clear(self):
+        with self.lock:
+            self.table.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+    def __len__(self):
+        return len(self.table)
+
+
+    def __str__(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups > 0 else 0
+        return ('Split memo: ' + str(len(self.table)) + ' entries, ' +
+                str(self.hits) + ' hits, ' + str(self.misses) +
+                ' misses (hit rate ' + '{:.2%}'.format(rate) + ')')
@@ -1,11 +1,40 @@
 from . import node
 from . import layer
-import copy
-
-
-class SST:
-    def __init__(self, fsm=None):
+from . import sst_base
+import numpy as np
+
+
+class SST(sst_base.SSTBase):
+    """
+    An SST whose layers are lists of Node objects, each of which holds the
+    initial and current state IDs of its FSM copies in arrays. A node is
+    split with one gather from the transition tables and grouped by output
+    with numpy, so its size costs no Python work. The nodes of a layer are
+    still split one by one; PartitionSST splits a whole layer at once and
+    is faster on large FSMs, while an SST keeps nodes that can be printed
+    with their traces and shares splits through a split memo.
+    """
+    def __init__(self, fsm=None, distinguishability=None, max_depth=None,
+                 split_memo=None, prefix_cache=None, trace_enabled=False):
+        """
+        If the pairwise distinguishability of the FSM states is given, a node
+        is not split when none of its states can be separated from the
+        others within the remaining max_depth layers. A split memo, if
+        given, is shared by all copies of the SST and saves the splits of
+        nodes with the same current states. A prefix cache, if given, is
+        shared by all copies of the SST and saves the layers expanded from
+        the same leading inputs. Node traces are only built when an SST is
+        printed, unless trace_enabled asks for them as nodes are split.
+
+        Layers are never changed once they are built: splitting a node
+        creates new arrays of state IDs for its children.
+        """
         self.fsm = fsm
+        self.distinguishability = distinguishability
+        self.max_depth = max_depth
+        self.split_memo = split_memo
+        self.prefix_cache = prefix_cache
+        self.trace_enabled = trace_enabled
         self.layers = []
 
         self.__init_top_layer()
@@ -18,22 +47,13 @@ class SST:
         layer_id = 0
         layer0 = layer.Layer(layer_id)
 
-        n1 = node.Node(layer_id)
-        
-        self.fsm.set_init_state(self.fsm.states[0])
-        self.fsm.set_current_state(self.fsm.states[0])
+        #  Every state of the shared FSM starts a copy of its own.
+        states = np.array([s.id for s in self.fsm.states], dtype=np.int32)
+        n1 = node.Node(layer_id, fsm=self.fsm, init_ids=states,
+                       current_ids=states)
 
-        n1.fsm_copies.append(self.fsm)
-        
-        for s in self.fsm.states:
-            if s.id == self.fsm.init_state.id:
-                continue
-            f = self.fsm.copy()
-            f.set_init_state(s)
-            f.set_current_state(s)
-            n1.fsm_copies.append(f)
-
-        n1.trace_splitting()
+        if self.trace_enabled:
+            n1.trace_splitting()
 
         layer0.nodes.append(n1)
         self.layers.append(layer0)
@@ -41,55 +61,21 @@ class SST:
         return layer0
 
 
-    def copy(self):
-        return copy.deepcopy(self)
-
-
-    def reset(self):
-        """
-        The first layer only contains one node that saves all copies
-        of FSMs with different initial state.
-        """
-        self.layers = self.layers[:1]
-        for m in self.layers[0].nodes[0].fsm_copies:
-            m.reset()
-
-
-    def expand_layers(self, inputs, base=1, rule=lambda x: 2*x):
-        """
-        The input base defines the boundary of the input characters
-        for splitting a layer. The rule inut takes a function handler
-        to generate the bounary of inputs for the next layer.
-        """        
-        if inputs == '':
-            return 'DONE', ('COMPLETE', '')
-        
-        layer_inputs = inputs[:base]
-        inputs = inputs[base:]
-              
-        if self.expand_layer(layer_inputs):
-            base = rule(base)
-            return self.expand_layers(inputs, base, rule)
-        else:
-            return 'DONE', ('STOP AT INPUTS', layer_inputs)
-
-
     def expand_layer(self, inputs):
         """
         The function always reads the last layer and, based upon inputs
         to split nodes.
         """        
         if len(inputs) == 0:
-            raise ValueError('Input = "'+inputs+'"')
+            raise ValueError('Input = ' + str(inputs))
 
+        #  Nodes take the input codes in turn, repeating them if there are
+        #  more nodes than inputs.
+        inputs = [int(i) for i in inputs]
         current_layer = self.layers[-1]
-        if (current_layer.number_of_nodes() > len(inputs)):
-            n1 = current_layer.number_of_nodes() // len(inputs)
-            n2 = current_layer.number_of_nodes() % len(inputs)
-            inputs = (inputs * n1) + inputs[:n2]
-        else:
-            inputs = inputs[:current_layer.number_of_nodes()]
-    
+        num_of_nodes = current_layer.number_of_nodes()
+        inputs = [inputs[j % len(inputs)] for j in range(num_of_nodes)]
+
         pair_ups = zip(current_layer.nodes, inputs)
 
         new_nodes = []
@@ -112,47 +98,76 @@ class SST:
         if not parent_node.splitable():
             return []
 
+        current_ids = parent_node.current_ids
+
+        if self.distinguishability is not None:
+            depth = self.max_depth - parent_node.layer_id
+            if not self.distinguishability.separable(current_ids, depth):
+                return []
+
+        if self.split_memo is None:
+            children = self.split_ids(current_ids, i)
+        else:
+            key = current_ids.tobytes()
+            children = self.split_memo.get(key, i)
+            if children is None:
+                children = self.split_ids(current_ids, i)
+                self.split_memo.put(key, i, children)
+
         new_nodes = []
-        outputs = {}
-        
-        for m in parent_node.fsm_copies:
-            o = m.trigger_trx(i)
-            if o in outputs:
-                outputs[o].append(m)
-            else:
-                outputs[o] = [m]
 
         node_id = 0 
-        for o in outputs:
+        for o, positions, next_ids in children:
             #  Need to further look at if Dummy Node is needed!!!
             #  if o is None:
             #     continue
 
             n1 = node.Node(layer_id=parent_node.layer_id+1,
-                           id_=node_id)
+                           id_=node_id,
+                           input_=i,
+                           output=o,
+                           parent=parent_node,
+                           fsm=self.fsm,
+                           init_ids=parent_node.init_ids[positions],
+                           current_ids=next_ids)
 
-            n1.input_labels.extend(parent_node.input_labels)
-            n1.output_labels.extend(parent_node.output_labels)
-            n1.input_labels.append(i)
-            n1.output_labels.append(str(o))
-            n1.parent = parent_node
-            n1.fsm_copies = outputs[o]
-
-            n1.trace_splitting()
+            if self.trace_enabled:
+                n1.trace_splitting()
 
-            parent_node.children.append(n1)
             new_nodes.append(n1)
             node_id = node_id + 1
 
         return new_nodes
 
 
-    def number_of_uios(self):
-        num_uios = 0
-        for layer in self.layers:
-            num_uios = (num_uios +
-                        layer.number_of_discrete_nodes())
-        return num_uios
+    def split_ids(self, current_ids, i):
+        """
+        The function applies input code i to a node with the given array of
+        current state IDs in one gather from the transition tables and
+        groups the states by output. It returns the children of the node,
+        in the order of the first appearance of their outputs, as (output
+        code, positions of the states in the node, next state IDs), where
+        positions and next state IDs are arrays in the order of the node.
+        """
+        #  The error state -1 addresses the last row of the tables.
+        codes = self.fsm.output_table[current_ids, i]
+        next_ids = self.fsm.next_state_table[current_ids, i]
+
+        outputs, firsts, groups = np.unique(codes, return_index=True,
+                                            return_inverse=True)
+        if len(outputs) == 1:
+            return [(int(outputs[0]), np.arange(len(codes)), next_ids)]
+
+        groups = groups.reshape(-1)
+        order = np.argsort(groups, kind='stable')
+        bounds = np.zeros(len(outputs)+1, dtype=np.intp)
+        bounds[1:] = np.cumsum(np.bincount(groups))
+
+        children = []
+        for g in np.argsort(firsts).tolist():
+            positions = order[bounds[g]:bounds[g+1]]
+            children.append((int(outputs[g]), positions, next_ids[positions]))
+        return children
 
 
     def report_uios(self):
@@ -0,0 +1,96 @@
+class SSTBase:
+    """
+    The expansion of an SST over a chromosome, shared by SST and
+    PartitionSST. A subclass keeps its layers in self.layers, the top layer
+    first, and splits the last layer with expand_layer(inputs), which
+    returns whether any node was split. It also sets self.prefix_cache,
+    which may be None.
+
+    Layers are never changed once they are built, so copying an SST only
+    copies its list of layers; everything else is shared by all copies.
+    """
+    def copy(self):
+        sst = self.__class__.__new__(self.__class__)
+        sst.__dict__.update(self.__dict__)
+        sst.layers = list(self.layers)
+        return sst
+
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+
+    def reset(self):
+        """
+        The function drops all layers but the first, whose only node holds
+        all states in their initial states. Layers are shared with other
+        copies of the SST and the prefix cache, so they are never reset in
+        place.
+        """
+        self.layers = self.layers[:1]
+
+
+    def expand_layers(self, inputs, base=1, rule=lambda x: 2*x, prefix=None,
+                      start=0):
+        """
+        The input base defines the boundary of the input characters
+        for splitting a layer. The rule input takes a function handler
+        to generate the boundary of inputs for the next layer. Inputs are
+        a sequence of input codes, read from the position start on. The
+        prefix is the node of the last layer in the prefix cache, if there
+        is one.
+        """
+        while start < len(inputs):
+            layer_inputs = inputs[start:start+base]
+            start = start + base
+
+            if self.prefix_cache is None:
+                expanded = self.expand_layer(layer_inputs)
+            else:
+                expanded, prefix = self.prefix_cache.expand_layer(
+                    self, layer_inputs, prefix)
+
+            if not expanded:
+                return 'DONE', ('STOP AT INPUTS', layer_inputs)
+
+            base = rule(base)
+
+        return 'DONE', ('COMPLETE', '')
+
+
+    def expand_layers_from(self, inputs, position, rule=lambda x: 2*x):
+        """
+        The SST was expanded from a sequence of inputs that agrees with
+        inputs before the given position. The function keeps the layers
+        expanded from the blocks of inputs before the block holding the
+        position and expands the rest of inputs from there.
+        """
+        #  Find the block of inputs that holds the position.
+        start = 0
+        base = 1
+        block = 0
+        while start + base <= position:
+            start = start + base
+            base = rule(base)
+            block = block + 1
+
+        #  The expansion stopped before this block, at a block that has not
+        #  changed, so it stops there again.
+        if block >= len(self.layers):
+            return 'DONE', ('UNCHANGED', '')
+
+        #  Layers in a prefix cache are reached from the top layer only.
+        if self.prefix_cache is not None:
+            self.reset()
+            return self.expand_layers(inputs, rule=rule)
+
+        self.layers = self.layers[:block+1]
+        return self.expand_layers(inputs, base, rule, start=start)
+
+
+    def number_of_uios(self):
+        num_uios = 0
+        for layer in self.layers:
+            num_uios = (num_uios +
+                        layer.number_of_discrete_nodes())
+        return num_uios
@@ -0,0 +1,54 @@
+class LayerSummary:
+    __slots__ = ('id', 'num_of_nodes', 'num_of_discrete_nodes')
+
+    def __init__(self, id_, num_of_nodes, num_of_discrete_nodes):
+        self.id = id_
+        self.num_of_nodes = num_of_nodes
+        self.num_of_discrete_nodes = num_of_discrete_nodes
+
+
+    def number_of_nodes(self):
+        return self.num_of_nodes
+
+
+    def number_of_discrete_nodes(self):
+        return self.num_of_discrete_nodes
+
+
+class SSTSummary:
+    """
+    The GA only needs three things from an SST: the numbers of discrete
+    and other nodes in each layer for its fitness, its UIOs and the number
+    of them. A summary keeps only these. It is filled in by the population
+    kernel, which expands the SSTs of a whole population, or of a single
+    individual, without building their trees, so no tree is stored during
+    or after the evaluation.
+
+    A summary stands in for an SST wherever the fitness evaluation and the
+    UIO statistics read one.
+    """
+    def __init__(self):
+        self.layers = []
+        self.uios = []
+
+
+    def number_of_uios(self):
+        num_uios = 0
+        for layer in self.layers:
+            num_uios = (num_uios +
+                        layer.number_of_discrete_nodes())
+        return num_uios
+
+
+    def report_uios(self):
+        return list(self.uios)
+
+
+    def __str__(self):
+        info = []
+        for l in self.layers:
+            info.append('Layer: ' + str(l.id) + ' : Nodes: ' +
+                        str(l.number_of_nodes()) + ' : Discrete nodes: ' +
+                        str(l.number_of_discrete_nodes()))
+        info.append('')
+        return '\n'.join(info)
@@ -0,0 +1,108 @@
+"""
+Small random FSMs and brute-force references for the tests. Run the tests
+from multiple_thread_app with `python -m unittest discover -s tests -t .`
+or `python -m pytest tests`.
+"""
+import itertools
+import os
+import tempfile
+import numpy as np
+from simulation.fsm import fsm
+
+
+def random_fsm(num_of_states, seed, input_set=('a', 'b'),
+               output_set=('x', 'y'), holes=0.0, tokens=False):
+    """
+    The function writes a random FSM in the text format and loads it. Each
+    transition is left undefined with probability holes. With tokens, the
+    states and some of the transitions carry tokens.
+    """
+    rng = np.random.default_rng(seed)
+    lines = ['states: ' + str(num_of_states)]
+    if tokens:
+        lines[0] = lines[0] + ': ' + '|'.join(
+            'S' + str(s) for s in range(num_of_states))
+    lines.append('input_set: ' + ', '.join(input_set))
+    lines.append('output_set: ' + ', '.join(output_set))
+    lines.append('')
+
+    tr_id = 1
+    for s in range(num_of_states):
+        for i in input_set:
+            if rng.random() < holes:
+                continue
+            e = int(rng.integers(num_of_states))
+            o = output_set[int(rng.integers(len(output_set)))]
+            line = '%d: %d:%d:%s:%s' % (tr_id, s, e, i, o)
+            if tokens and tr_id % 3 == 0:
+                line = line + ': t' + str(tr_id)
+            lines.append(line)
+            tr_id = tr_id + 1
+
+    fd, f_name = tempfile.mkstemp(suffix='.txt')
+    try:
+        with os.fdopen(fd, 'w') as fn:
+            fn.write('\n'.join(lines) + '\n')
+        return fsm.FSM(f_name, save_enabled=False)
+    finally:
+        os.remove(f_name)
+
+
+def run(m, s, inputs):
+    """
+    The outputs of state s on a sequence of input codes. An undefined
+    transition gives -1 and enters the error state, which stays there.
+    """
+    outputs = []
+    for i in inputs:
+        if s == -1:
+            outputs.append(-1)
+            continue
+        outputs.append(int(m.output_table[s, i]))
+        s = int(m.next_state_table[s, i])
+    return tuple(outputs)
+
+
+def end_state(m, s, inputs):
+    """
+    The state s moves to on a sequence of input codes, where the error
+    state is the last row of the tables.
+    """
+    error = m.num_of_states
+    for i in inputs:
+        if s != error:
+            s = int(m.next_state_table[s, i])
+            s = error if s == -1 else s
+    return s
+
+
+def sequences(num_of_inputs, max_length):
+    """
+    All sequences of input codes of 1 to max_length inputs, shortest first.
+    """
+    for length in range(1, max_length+1):
+        for seq in itertools.product(range(num_of_inputs), repeat=length):
+            yield seq
+
+
+def is_uio(m, s, inputs, outputs):
+    """
+    A UIO of state s is a sequence on which s produces outputs without
+    entering the error state, and no other state produces them.
+    """
+    outputs = tuple(outputs)
+    if -1 in outputs or run(m, s, inputs) != outputs:
+        return False
+    return all(run(m, t, inputs) != outputs
+               for t in range(m.num_of_states) if t != s)
+
+
+def shortest_distinguishing_length(m, s1, s2, max_length):
+    """
+    The length of a shortest sequence on which s1 and s2 produce different
+    outputs, or 0 if there is none within max_length.
+    """
+    for seq in sequences(len(m.input_set), max_length):
+        if run(m, s1, seq) != run(m, s2, seq):
+            return len(seq)
+    return 0
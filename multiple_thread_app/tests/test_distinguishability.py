@@ -0,0 +1,107 @@
+import unittest
+import numpy as np
+import main
+from simulation.fsm import distinguishability as ds
+from tests import helpers
+
+
+class DistinguishabilityTest(unittest.TestCase):
+    MAX_LENGTH = 4
+
+    def fsms(self):
+        for seed in range(12):
+            yield helpers.random_fsm(6, seed, holes=0.0)
+            yield helpers.random_fsm(6, seed, holes=0.25)
+
+
+    def test_lengths_match_brute_force(self):
+        for m in self.fsms():
+            d = ds.Distinguishability(m, self.MAX_LENGTH)
+            for s1 in range(m.num_of_states):
+                for s2 in range(m.num_of_states):
+                    expected = helpers.shortest_distinguishing_length(
+                        m, s1, s2, self.MAX_LENGTH)
+                    self.assertEqual(d.length(s1, s2), expected, (s1, s2))
+
+
+    def test_sequences_distinguish_at_their_length(self):
+        for m in self.fsms():
+            d = ds.Distinguishability(m, self.MAX_LENGTH)
+            for s1 in range(m.num_of_states):
+                for s2 in range(m.num_of_states):
+                    seq = d.sequence(s1, s2)
+                    if seq is None:
+                        self.assertEqual(d.length(s1, s2), 0)
+                        continue
+                    self.assertEqual(len(seq), d.length(s1, s2))
+                    self.assertNotEqual(helpers.run(m, s1, seq),
+                                        helpers.run(m, s2, seq))
+
+
+    def test_uio_candidates_match_brute_force(self):
+        for m in self.fsms():
+            d = ds.Distinguishability(m, self.MAX_LENGTH)
+            n = m.num_of_states
+            expected = [s for s in range(n)
+                        if all(helpers.shortest_distinguishing_length(
+                            m, s, t, self.MAX_LENGTH) > 0
+                               for t in range(n) if t != s)]
+            self.assertEqual(d.uio_candidates(), expected)
+
+
+    def test_blocks_and_threads_give_the_same_lengths(self):
+        for m in self.fsms():
+            d1 = ds.Distinguishability(m, self.MAX_LENGTH)
+            d2 = ds.Distinguishability(m, self.MAX_LENGTH, threads=3,
+                                       block_size=2)
+            self.assertTrue(np.array_equal(d1.lengths, d2.lengths))
+
+
+    def test_separable_leaves_the_ids_unchanged(self):
+        m = helpers.random_fsm(6, 3, holes=0.25)
+        d = ds.Distinguishability(m, self.MAX_LENGTH)
+        for dtype in (np.intp, np.int32):
+            ids = np.array([0, -1, 2, -1, 5], dtype=dtype)
+            d.separable(ids, self.MAX_LENGTH)
+            self.assertEqual(ids.tolist(), [0, -1, 2, -1, 5])
+
+
+    def test_merged_states_have_no_uios(self):
+        merged = 0
+        for seed in range(40):
+            m = helpers.random_fsm(7, seed, holes=0.1)
+            q = m.minimise()
+            d = ds.Distinguishability(q, self.MAX_LENGTH)
+            without = main.states_without_uios(q, d)
+
+            self.assertNotIn(None, without)
+            for block in q.state_blocks:
+                if len(block) > 1:
+                    merged = merged + 1
+                    for s in block:
+                        self.assertIn(s, without)
+
+            #  A state with a UIO on the original FSM is never listed.
+            for s in range(m.num_of_states):
+                if s in without:
+                    continue
+                self.assertTrue(all(
+                    helpers.shortest_distinguishing_length(
+                        m, s, t, self.MAX_LENGTH) > 0
+                    for t in range(m.num_of_states) if t != s))
+
+        self.assertGreater(merged, 0)
+
+
+    def test_merged_states_are_listed_without_distinguishability(self):
+        for seed in range(40):
+            m = helpers.random_fsm(7, seed, holes=0.1)
+            q = m.minimise()
+            merged = sorted(s for block in q.state_blocks if len(block) > 1
+                            for s in block)
+            self.assertEqual(main.states_without_uios(q), merged)
+            self.assertIsNone(main.states_without_uios(m))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from simulation.fsm import fsm
+from tests import helpers
+
+
+class FSMFormatTest(unittest.TestCase):
+    def fsms(self):
+        for seed in range(10):
+            yield helpers.random_fsm(7, seed, input_set=('a', 'b', 'c'),
+                                     holes=0.2, tokens=seed % 2 == 0)
+
+
+    def assertSameFSM(self, m1, m2):
+        self.assertEqual(m1.num_of_states, m2.num_of_states)
+        self.assertEqual(m1.num_of_transitions, m2.num_of_transitions)
+        self.assertEqual(list(m1.input_set), list(m2.input_set))
+        self.assertEqual(list(m1.output_set), list(m2.output_set))
+        for t1, t2 in ((m1.next_state_table, m2.next_state_table),
+                       (m1.output_table, m2.output_table),
+                       (m1.transition_id_table, m2.transition_id_table)):
+            self.assertTrue(np.array_equal(t1, t2))
+        self.assertEqual([s.token for s in m1.states],
+                         [s.token for s in m2.states])
+        self.assertEqual(m1.transition_tokens, m2.transition_tokens)
+
+
+    def test_binary_round_trip(self):
+        with tempfile.TemporaryDirectory() as d:
+            for k, m in enumerate(self.fsms()):
+                f_name = os.path.join(d, 'm%d%s' % (k, fsm.FSM.BINARY_EXT))
+                m.save_binary(f_name)
+                m2 = fsm.FSM(f_name, save_enabled=False)
+                self.assertSameFSM(m, m2)
+                self.assertEqual(
+                    [(tr.id, tr.token) for tr in m.transitions],
+                    [(tr.id, tr.token) for tr in m2.transitions])
+
+
+    def test_binary_tables_are_read_only(self):
+        with tempfile.TemporaryDirectory() as d:
+            m = helpers.random_fsm(5, 0)
+            f_name = os.path.join(d, 'm' + fsm.FSM.BINARY_EXT)
+            m.save_binary(f_name)
+            m2 = fsm.FSM(f_name, save_enabled=False)
+            with self.assertRaises(ValueError):
+                m2.next_state_table[0, 0] = 1
+
+
+    def test_text_round_trip(self):
+        with tempfile.TemporaryDirectory() as d:
+            for k, m in enumerate(self.fsms()):
+                f_name = os.path.join(d, 'm%d.txt' % k)
+                m.save_text(f_name)
+                self.assertSameFSM(m, fsm.FSM(f_name, save_enabled=False))
+
+
+    def test_text_and_binary_agree(self):
+        with tempfile.TemporaryDirectory() as d:
+            for k, m in enumerate(self.fsms()):
+                f_text = os.path.join(d, 'm%d.txt' % k)
+                f_binary = os.path.join(d, 'm%d%s' % (k, fsm.FSM.BINARY_EXT))
+                m.save_text(f_text)
+                fsm.FSM(f_text, save_enabled=False).save_binary(f_binary)
+                self.assertSameFSM(m, fsm.FSM(f_binary, save_enabled=False))
+
+
+if __name__ == '__main__':
+    unittest.main()
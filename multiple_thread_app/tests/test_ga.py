@@ -0,0 +1,154 @@
+import json
+import random
+import unittest
+import numpy as np
+from simulation.ga import ga
+from simulation.sst import sst
+from simulation.sst import summary
+from tests import helpers
+from tests import test_population_kernel
+from tests import test_sst
+
+
+PARM_FILE = 'input_output/config/parms/parms.json'
+
+
+def make_ga(m, pop_size=10, max_length=5, **settings):
+    """
+    A GA on the FSM with the default parameters, a small population and
+    the given GA or SST settings, each given as section__name.
+    """
+    with open(PARM_FILE, 'r') as fn:
+        parms = json.load(fn)
+    parms['SysConfig'] = {'CPUs': 1}
+    parms['ParallelismEnabled'] = False
+    parms['DebugEnabled'] = False
+    parms['MaxUIOLength'] = max_length
+    parms['GA']['PopulationSize'] = pop_size
+    for key, value in settings.items():
+        section, name = key.split('__')
+        parms[section][name] = value
+
+    return ga.GA(m, sst.SST(fsm=m), parms)
+
+
+class GATest(unittest.TestCase):
+    def assertSameAsSSTs(self, g):
+        pop = g.population
+        for i in range(len(pop)):
+            t = g.sst.copy()
+            t.expand_layers(pop.genomes[pop.active, i],
+                            rule=g.splitting_rule)
+            s = pop.ssts[pop.active][i]
+            self.assertIsInstance(s, summary.SSTSummary)
+            self.assertEqual(test_population_kernel.layers(s),
+                             test_population_kernel.layers(t))
+            self.assertEqual(s.report_uios(), t.report_uios())
+            self.assertEqual(s.number_of_uios(), t.number_of_uios())
+
+
+    def test_summaries_match_ssts(self):
+        random.seed(0)
+        for _, m in test_sst.fsms(4):
+            g = make_ga(m, SST__SummaryEnabled=True)
+            g.produce_all_ssts()
+            self.assertSameAsSSTs(g)
+
+            #  Offspring are summarised again rather than expanded from
+            #  the summaries of their parents.
+            g.crossover()
+            g.produce_all_ssts()
+            self.assertSameAsSSTs(g)
+
+
+    def crossover(self, operator, pop_size):
+        """
+        The function runs a crossover on a population whose individual i
+        has the input i at every position, so each input of a child tells
+        its parent. It returns the parent each child is expanded from, as
+        recorded in its lineage, and the children.
+        """
+        g = make_ga(helpers.random_fsm(6, 0), pop_size=pop_size,
+                    GA__XOverOperator=operator)
+        pop = g.population
+        pop.genomes[pop.active] = np.arange(pop_size)[:, None]
+        for i in range(pop_size):
+            pop.set_sst(i, i)
+
+        g.crossover()
+        parents = [pop.lineages[pop.active][j][0] for j in range(pop_size)]
+        return g, parents, pop.genomes[pop.active].tolist()
+
+
+    def assertPairs(self, parents, children):
+        """
+        The children of a pair take every input from one of their two
+        parents, each from the other one, and the first child of the last
+        pair of an odd population is kept alone.
+        """
+        for j in range(0, len(children), 2):
+            p1 = parents[j]
+            if j + 1 == len(children):
+                self.assertIn(p1, children[j])
+                self.assertLessEqual(len(set(children[j])), 2)
+                continue
+
+            p2 = parents[j+1]
+            self.assertNotEqual(p1, p2)
+            for c1, c2 in zip(children[j], children[j+1]):
+                self.assertIn((c1, c2), ((p1, p2), (p2, p1)))
+
+
+    def cuttings(self, parents, children):
+        """
+        The cutting points of the first child of each pair, where it
+        switches between its parents. A child starts with its own parent.
+        """
+        points = []
+        for j in range(0, len(children), 2):
+            child = children[j]
+            self.assertEqual(child[0], parents[j])
+            points.append([k for k in range(1, len(child))
+                           if child[k] != child[k-1]])
+        return points
+
+
+    def test_single_point_crossover(self):
+        for operator, pop_size in ((0, 10), (3, 10), (3, 9)):
+            for seed in range(5):
+                random.seed(seed)
+                g, parents, children = self.crossover(operator, pop_size)
+                self.assertPairs(parents, children)
+                for j, points in enumerate(self.cuttings(parents,
+                                                         children)):
+                    self.assertEqual(len(points), 1)
+                    self.assertTrue(1 <= points[0] < g.chromosome_length)
+
+                    #  The lineage starts at the cutting point.
+                    self.assertEqual(g.population.lineages[
+                        g.population.active][2*j][1], points[0])
+
+
+    def test_multiple_point_crossover(self):
+        for operator, pop_size in ((1, 10), (4, 10), (4, 9)):
+            for seed in range(5):
+                random.seed(seed)
+                g, parents, children = self.crossover(operator, pop_size)
+                self.assertPairs(parents, children)
+                num_of_points = g.parms['GA']['MultipleXOverPoints']
+                for points in self.cuttings(parents, children):
+                    self.assertEqual(len(points), num_of_points)
+                    self.assertTrue(1 <= points[0])
+                    self.assertTrue(points[-1] < g.chromosome_length)
+
+
+    def test_uniform_crossover(self):
+        for operator, pop_size in ((2, 10), (5, 10), (5, 9)):
+            for seed in range(5):
+                random.seed(seed)
+                _, parents, children = self.crossover(operator, pop_size)
+                self.assertPairs(parents, children)
+
+
+if __name__ == '__main__':
+    unittest.main()
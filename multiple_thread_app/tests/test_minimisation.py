@@ -0,0 +1,66 @@
+import unittest
+from simulation.fsm import minimisation
+from tests import helpers
+
+
+class MinimisationTest(unittest.TestCase):
+    NUM_OF_STATES = 6
+
+    def fsms(self):
+        for seed in range(30):
+            yield helpers.random_fsm(self.NUM_OF_STATES, seed, holes=0.0)
+            yield helpers.random_fsm(self.NUM_OF_STATES, seed, holes=0.25)
+
+
+    def test_blocks_match_brute_force(self):
+        merged = 0
+        for m in self.fsms():
+            blocks = minimisation.equivalence_blocks(m).tolist()
+            #  With the error state, states that are told apart at all are
+            #  told apart by a sequence of at most this many inputs.
+            n = m.num_of_states
+            for s1 in range(n):
+                for s2 in range(s1+1, n):
+                    equivalent = helpers.shortest_distinguishing_length(
+                        m, s1, s2, n) == 0
+                    self.assertEqual(blocks[s1] == blocks[s2], equivalent,
+                                     (s1, s2))
+                    merged = merged + equivalent
+        self.assertGreater(merged, 0)
+
+
+    def test_blocks_are_numbered_by_first_state(self):
+        for m in self.fsms():
+            blocks = minimisation.equivalence_blocks(m).tolist()
+            firsts = [blocks.index(b) for b in range(max(blocks)+1)]
+            self.assertEqual(firsts, sorted(firsts))
+
+
+    def test_quotient_behaves_like_the_original(self):
+        for m in self.fsms():
+            q = m.minimise()
+            blocks = minimisation.equivalence_blocks(m).tolist()
+            self.assertEqual(q.num_of_states, len(q.state_blocks))
+            self.assertEqual(sorted(s for b in q.state_blocks for s in b),
+                             list(range(m.num_of_states)))
+
+            for b, block in enumerate(q.state_blocks):
+                self.assertEqual(q.original_state_id(b),
+                                 block[0] if len(block) == 1 else None)
+                for s in block:
+                    self.assertEqual(blocks[s], b)
+                    for seq in helpers.sequences(len(m.input_set), 4):
+                        self.assertEqual(helpers.run(q, b, seq),
+                                         helpers.run(m, s, seq))
+
+
+    def test_quotient_is_minimal(self):
+        for m in self.fsms():
+            q = m.minimise()
+            self.assertTrue(q.is_minimal())
+            self.assertEqual(m.is_minimal(),
+                             q.num_of_states == m.num_of_states)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import numpy as np
+from simulation.ga import population
+
+
+def make_population(size=6, length=8):
+    """
+    A population whose individual i has the inputs i, i+1, ... and the
+    fitness values i.
+    """
+    pop = population.Population(size, length, np.int16)
+    genomes = np.arange(size)[:, None] + np.arange(length)
+    pop.genomes[pop.active] = genomes
+    pop.fitness[pop.active] = np.arange(size)
+    pop.scaled_fitness[pop.active] = np.arange(size) / 10
+    pop.sharing_max[pop.active] = np.arange(size) / 100
+    pop.sharing_counts[pop.active] = np.arange(size)
+    return pop
+
+
+class PopulationTest(unittest.TestCase):
+    def test_copy_individuals_writes_the_target_buffer(self):
+        pop = make_population()
+        active = pop.genomes[pop.active].copy()
+        t = pop.target()
+        self.assertNotEqual(t, pop.active)
+
+        pop.ssts[pop.active][4] = 'sst 4'
+        pop.lineages[pop.active][1] = ('sst', 3)
+        ids = np.array([4, 1, 4])
+        targets = np.array([0, 2, 5])
+        pop.copy_individuals(ids, targets)
+
+        for i, j in zip(ids.tolist(), targets.tolist()):
+            self.assertEqual(pop.genomes[t, j].tolist(), active[i].tolist())
+            self.assertEqual(pop.fitness[t, j], i)
+            self.assertEqual(pop.scaled_fitness[t, j], i / 10)
+            self.assertEqual(pop.sharing_max[t, j], i / 100)
+            self.assertEqual(pop.sharing_counts[t, j], i)
+            self.assertIs(pop.ssts[t][j], pop.ssts[pop.active][i])
+            self.assertIs(pop.lineages[t][j], pop.lineages[pop.active][i])
+
+        #  The active population is not changed.
+        self.assertEqual(pop.genomes[pop.active].tolist(), active.tolist())
+        self.assertEqual(pop.fitness[pop.active].tolist(), list(range(6)))
+
+
+    def test_swap_flips_the_buffers(self):
+        pop = make_population()
+        pop.copy_individuals(np.array([3]), np.array([0]))
+
+        a = pop.active
+        pop.swap()
+        self.assertEqual(pop.active, 1 - a)
+        self.assertEqual(pop.target(), a)
+        self.assertEqual(pop.genomes[pop.active, 0].tolist(),
+                         pop.genomes[a, 3].tolist())
+
+        pop.swap()
+        self.assertEqual(pop.active, a)
+
+
+    def test_offspring_lineage_positions(self):
+        pop = make_population()
+        a = pop.active
+        t = pop.target()
+        pop.ssts[a][0] = 'sst 0'
+        pop.ssts[a][1] = 'sst 1'
+        pop.lineages[a][2] = ('sst 1', 5)
+
+        inputs = pop.genomes[a, [0, 0, 1, 2, 2, 3]].copy()
+        inputs[0, 6] = 99
+        inputs[2, 0] = 99
+        inputs[3, 3] = 99
+        inputs[4, 7] = 99
+        ids = np.arange(6)
+        parents = np.array([0, 0, 1, 2, 2, 3])
+        pop.ssts[t][5] = 'old sst'
+        pop.set_offsprings(ids, inputs, parents)
+
+        #  The first position that differs from the parent, the whole
+        #  length if none does, and never past the position of the
+        #  lineage the parent is still to be expanded from.
+        self.assertEqual(pop.lineages[t][0], ('sst 0', 6))
+        self.assertEqual(pop.lineages[t][1], ('sst 0', 8))
+        self.assertEqual(pop.lineages[t][2], ('sst 1', 0))
+        self.assertEqual(pop.lineages[t][3], ('sst 1', 3))
+        self.assertEqual(pop.lineages[t][4], ('sst 1', 5))
+        #  A parent without an SST or a lineage gives none.
+        self.assertIsNone(pop.lineages[t][5])
+
+        self.assertEqual(pop.ssts[t], [None] * 6)
+        self.assertEqual(pop.genomes[t].tolist(), inputs.tolist())
+        self.assertEqual(pop.fitness[t].tolist(), [-1] * 6)
+        self.assertEqual(pop.scaled_fitness[t].tolist(), [-1] * 6)
+        self.assertEqual(pop.sharing_max[t].tolist(), [0] * 6)
+        self.assertEqual(pop.sharing_counts[t].tolist(), [0] * 6)
+
+
+    def test_set_sst_drops_the_lineage(self):
+        pop = make_population()
+        pop.lineages[pop.active][2] = ('sst', 1)
+        pop.set_sst(2, 'new sst')
+        self.assertEqual(pop.ssts[pop.active][2], 'new sst')
+        self.assertIsNone(pop.lineages[pop.active][2])
+
+
+if __name__ == '__main__':
+    unittest.main()
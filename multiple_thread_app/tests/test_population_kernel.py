@@ -0,0 +1,61 @@
+import unittest
+from simulation.fsm import distinguishability as ds
+from simulation.sst import population_kernel as pk
+from simulation.sst import sst
+from tests import test_sst
+
+
+RULES = (lambda x: 2*x, lambda x: x, lambda x: x + 3)
+
+
+def layers(t):
+    """
+    The ID and the numbers of nodes and discrete nodes of each layer of an
+    SST or a summary.
+    """
+    return [(l.id, l.number_of_nodes(), l.number_of_discrete_nodes())
+            for l in t.layers]
+
+
+class PopulationKernelTest(unittest.TestCase):
+    def assertSameAsSSTs(self, template, chromosomes, rule):
+        kernel = pk.PopulationKernel(template, rule)
+        summaries = kernel.expand_population(chromosomes)
+        self.assertEqual(len(summaries), len(chromosomes))
+
+        for inputs, s in zip(chromosomes, summaries):
+            t = template.copy()
+            t.expand_layers(inputs, rule=rule)
+            self.assertEqual(layers(s), layers(t))
+            self.assertEqual(s.report_uios(), t.report_uios())
+            self.assertEqual(s.number_of_uios(), t.number_of_uios())
+
+
+    def test_summaries_match_ssts(self):
+        for seed, m in test_sst.fsms():
+            for rule in RULES:
+                self.assertSameAsSSTs(sst.SST(fsm=m),
+                                      test_sst.chromosomes(m, seed), rule)
+
+
+    def test_summaries_match_ssts_with_distinguishability(self):
+        for seed, m in test_sst.fsms():
+            for max_depth in (2, 5):
+                d = ds.Distinguishability(m, max_depth)
+                template = sst.SST(fsm=m, distinguishability=d,
+                                   max_depth=max_depth)
+                self.assertSameAsSSTs(template,
+                                      test_sst.chromosomes(m, seed),
+                                      lambda x: 2*x)
+
+
+    def test_short_chromosomes(self):
+        for seed, m in test_sst.fsms(4):
+            for length in (1, 2, 4):
+                chromosomes = test_sst.chromosomes(m, seed, length=length)
+                self.assertSameAsSSTs(sst.SST(fsm=m), chromosomes,
+                                      lambda x: 2*x)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import numpy as np
+from simulation.sst import partition_sst as psst
+from simulation.sst import prefix_cache as pc
+from simulation.sst import sst
+from tests import helpers
+from tests import test_sst
+
+
+class PrefixCacheTest(unittest.TestCase):
+    def assertConsistent(self, cache):
+        #  Every saved layer is reachable from the root, and the size counts
+        #  the FSM copies of exactly those layers.
+        reachable = []
+        nodes = list(cache.root.children.values())
+        while nodes:
+            n = nodes.pop()
+            reachable.append(n)
+            nodes.extend(n.children.values())
+        self.assertEqual(set(reachable), set(cache.nodes))
+        self.assertEqual(len(reachable), len(cache.nodes))
+
+        sizes = [1 if n.layer is None else n.layer.number_of_states()
+                 for n in reachable]
+        self.assertEqual(cache.size, sum(sizes))
+        self.assertLessEqual(cache.size, cache.max_size)
+
+
+    def test_cached_layers_are_the_same(self):
+        for seed, m in test_sst.fsms():
+            for max_size in (8, 64, 4096):
+                #  A cache is shared by the SSTs of one template only.
+                cache = pc.PrefixCache(max_size)
+                partition_cache = pc.PrefixCache(max_size)
+                for inputs in test_sst.chromosomes(m, seed, length=15):
+                    t1 = sst.SST(fsm=m)
+                    t1.expand_layers(inputs)
+                    t2 = sst.SST(fsm=m, prefix_cache=cache)
+                    t2.expand_layers(inputs)
+                    self.assertEqual(test_sst.sst_layers(t1),
+                                     test_sst.sst_layers(t2))
+
+                    t3 = psst.PartitionSST(fsm=m,
+                                           prefix_cache=partition_cache)
+                    t3.expand_layers(inputs)
+                    self.assertEqual(test_sst.sst_layers(t1),
+                                     test_sst.partition_layers(t3))
+                self.assertConsistent(cache)
+                self.assertConsistent(partition_cache)
+
+
+    def test_size_counts_fsm_copies(self):
+        m = helpers.random_fsm(7, 0, input_set=('a', 'b', 'c'))
+        cache = pc.PrefixCache(30)
+        rng = np.random.default_rng(0)
+        for inputs in rng.integers(3, size=(40, 15)).tolist():
+            t = sst.SST(fsm=m, prefix_cache=cache)
+            t.expand_layers(inputs)
+            self.assertConsistent(cache)
+        self.assertGreater(len(cache), 0)
+
+
+    def test_evicted_prefix_is_not_extended(self):
+        m = helpers.random_fsm(7, 0, input_set=('a', 'b', 'c'))
+        cache = pc.PrefixCache(20)
+
+        t = sst.SST(fsm=m)
+        expanded, prefix = cache.expand_layer(t, [0])
+        self.assertTrue(expanded)
+
+        #  Other SSTs fill the cache and evict the prefix.
+        rng = np.random.default_rng(1)
+        for inputs in rng.integers(1, 3, size=(20, 7)).tolist():
+            sst.SST(fsm=m, prefix_cache=cache).expand_layers(inputs)
+        self.assertNotIn(prefix, cache.nodes)
+
+        expanded, child = cache.expand_layer(t, [1, 2], prefix)
+        self.assertNotIn(child, cache.nodes)
+        self.assertConsistent(cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
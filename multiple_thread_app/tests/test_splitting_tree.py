@@ -0,0 +1,105 @@
+import types
+import unittest
+from simulation.search import splitting_tree as stree
+from tests import helpers
+
+
+class SplittingTreeTest(unittest.TestCase):
+    def check_fsms(self, holes):
+        checked = 0
+        for seed in range(60):
+            m = helpers.random_fsm(6, seed, input_set=('a', 'b', 'c'),
+                                   holes=holes)
+            t = stree.SplittingTree(m)
+            if not t.build():
+                continue
+
+            checked = checked + 1
+            for s, (inputs, outputs) in t.adaptive_uios().items():
+                self.assertTrue(helpers.is_uio(m, s, inputs, outputs),
+                                (seed, s, inputs, outputs))
+        return checked
+
+
+    def test_uios_of_complete_fsms(self):
+        self.assertGreater(self.check_fsms(holes=0.0), 0)
+
+
+    def test_uios_of_partial_fsms(self):
+        self.assertGreater(self.check_fsms(holes=0.2), 0)
+
+
+    def test_complete_fsm_gives_every_state_a_uio(self):
+        for seed in range(60):
+            m = helpers.random_fsm(6, seed, input_set=('a', 'b', 'c'))
+            t = stree.SplittingTree(m)
+            if t.build():
+                self.assertEqual(sorted(t.adaptive_uios()), list(range(6)))
+
+
+    def test_sigmas_split_blocks_into_children(self):
+        for seed in range(60):
+            m = helpers.random_fsm(6, seed, input_set=('a', 'b', 'c'),
+                                   holes=0.2)
+            t = stree.SplittingTree(m)
+            if not t.build():
+                continue
+
+            nodes = [t.root]
+            while nodes:
+                n = nodes.pop()
+                nodes.extend(n.children)
+                if n.children == []:
+                    continue
+
+                sigma = t.sigma(n)
+                groups = {}
+                ends = set()
+                for s in n.block:
+                    outputs = helpers.run(m, s, sigma)
+                    groups.setdefault(outputs, set()).add(s)
+                    ends.add((outputs, helpers.end_state(m, s, sigma)))
+
+                #  A valid sigma never merges two states of the block.
+                self.assertEqual(len(ends), len(n.block), (seed, sigma))
+                self.assertEqual(
+                    sorted(sorted(b) for b in groups.values()),
+                    sorted(sorted(c.block) for c in n.children))
+
+
+    def test_start_records_whether_there_is_an_ads(self):
+        found = set()
+        for seed in range(60):
+            m = helpers.random_fsm(6, seed, input_set=('a', 'b', 'c'))
+            stat = types.SimpleNamespace(all_discovered_uios={},
+                                         states_without_uios=None)
+            self.assertEqual(stree.SplittingTree(m).start(stat),
+                             stat.ads_found)
+            found.add(stat.ads_found)
+        self.assertEqual(found, {True, False})
+
+
+    def test_start_reports_states_whose_path_is_undefined(self):
+        reported = 0
+        for seed in range(60):
+            m = helpers.random_fsm(6, seed, input_set=('a', 'b', 'c'),
+                                   holes=0.2)
+            stat = types.SimpleNamespace(all_discovered_uios={},
+                                         states_without_uios=None)
+            if not stree.SplittingTree(m).start(stat):
+                continue
+
+            without = stat.states_without_uios or []
+            reported = reported + len(without)
+            self.assertEqual(sorted(list(stat.all_discovered_uios) + without),
+                             list(range(6)))
+            for uios in stat.all_discovered_uios.values():
+                for _, o in uios:
+                    self.assertNotIn('None', o)
+
+        #  Some of the partial FSMs need an undefined transition.
+        self.assertGreater(reported, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
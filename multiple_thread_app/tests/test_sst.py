@@ -0,0 +1,148 @@
+import itertools
+import unittest
+import numpy as np
+from simulation.fsm import distinguishability as ds
+from simulation.sst import partition_sst as psst
+from simulation.sst import prefix_cache as pc
+from simulation.sst import split_memo as sm
+from simulation.sst import sst
+from tests import helpers
+
+
+def chromosomes(m, seed, count=8, length=31):
+    rng = np.random.default_rng(seed)
+    return rng.integers(len(m.input_set), size=(count, length)).tolist()
+
+
+def fsms(count=10):
+    for seed in range(count):
+        yield seed, helpers.random_fsm(6, seed, holes=0.0)
+        yield seed, helpers.random_fsm(7, seed, input_set=('a', 'b', 'c'),
+                                       holes=0.2)
+
+
+def sst_layers(t):
+    """
+    The nodes of each layer of an SST as (inputs, outputs, initial state
+    IDs, current state IDs).
+    """
+    return [[(n.input_labels, n.output_labels, n.init_ids.tolist(),
+              n.current_ids.tolist()) for n in layer.nodes]
+            for layer in t.layers]
+
+
+def partition_layers(t):
+    layers = []
+    for layer in t.layers:
+        nodes = []
+        for k in range(layer.number_of_nodes()):
+            inputs, outputs = layer.labels(k)
+            nodes.append((inputs, outputs) + layer.node_states(k))
+        layers.append(nodes)
+    return layers
+
+
+class SSTTest(unittest.TestCase):
+    def test_nodes_match_brute_force(self):
+        for seed, m in fsms():
+            error = m.num_of_states
+            for inputs in chromosomes(m, seed):
+                t = sst.SST(fsm=m)
+                t.expand_layers(inputs)
+
+                for nodes in sst_layers(t):
+                    for labels_in, labels_out, inits, currents in nodes:
+                        for s, current in zip(inits, currents):
+                            self.assertEqual(
+                                helpers.run(m, s, labels_in),
+                                tuple(labels_out))
+                            end = helpers.end_state(m, s, labels_in)
+                            self.assertEqual(end, error if current == -1
+                                             else current)
+
+                #  A discrete node gives a UIO of its state.
+                for layer in t.layers:
+                    for n in layer.nodes:
+                        if n.is_discrete():
+                            self.assertTrue(helpers.is_uio(
+                                m, int(n.init_ids[0]), n.input_labels,
+                                n.output_labels))
+
+
+    def test_split_memo_gives_the_same_layers(self):
+        for seed, m in fsms():
+            memo = sm.SplitMemo(16)
+            for inputs in chromosomes(m, seed):
+                t1 = sst.SST(fsm=m)
+                t1.expand_layers(inputs)
+                t2 = sst.SST(fsm=m, split_memo=memo)
+                t2.expand_layers(inputs)
+                self.assertEqual(sst_layers(t1), sst_layers(t2))
+            self.assertGreater(memo.hits, 0)
+
+
+    def test_partition_sst_matches_sst(self):
+        for seed, m in fsms():
+            for inputs in chromosomes(m, seed):
+                t1 = sst.SST(fsm=m)
+                t2 = psst.PartitionSST(fsm=m)
+                self.assertEqual(t1.expand_layers(inputs),
+                                 t2.expand_layers(inputs))
+
+                self.assertEqual(sst_layers(t1), partition_layers(t2))
+                self.assertEqual(t1.report_uios(), t2.report_uios())
+                self.assertEqual(t1.number_of_uios(), t2.number_of_uios())
+                self.assertEqual(str(t1), str(t2))
+
+
+    def test_partition_sst_matches_sst_with_distinguishability(self):
+        for seed, m in fsms():
+            for max_depth in (2, 5):
+                d = ds.Distinguishability(m, max_depth)
+                for inputs in chromosomes(m, seed):
+                    t1 = sst.SST(fsm=m, distinguishability=d,
+                                 max_depth=max_depth)
+                    t2 = psst.PartitionSST(fsm=m, distinguishability=d,
+                                           max_depth=max_depth)
+                    self.assertEqual(t1.expand_layers(inputs),
+                                     t2.expand_layers(inputs))
+                    self.assertEqual(sst_layers(t1), partition_layers(t2))
+                    self.assertEqual(t1.report_uios(), t2.report_uios())
+
+
+    def test_expand_layers_from_matches_a_new_sst(self):
+        for seed, m in fsms():
+            rng = np.random.default_rng(seed)
+            templates = [(sst.SST(fsm=m), sst_layers),
+                         (sst.SST(fsm=m, split_memo=sm.SplitMemo(16)),
+                          sst_layers),
+                         (sst.SST(fsm=m, prefix_cache=pc.PrefixCache(64)),
+                          sst_layers),
+                         (psst.PartitionSST(fsm=m), partition_layers)]
+            for inputs in chromosomes(m, seed):
+                #  The child agrees with its parent before the position.
+                position = int(rng.integers(len(inputs)))
+                child = list(inputs)
+                for j in range(position, len(child)):
+                    if rng.random() < 0.5:
+                        child[j] = int(rng.integers(len(m.input_set)))
+
+                for (template, layers_of), rule in itertools.product(
+                        templates, (lambda x: 2*x, lambda x: x + 1)):
+                    parent = template.copy()
+                    parent.expand_layers(inputs, rule=rule)
+                    expected = layers_of(parent)
+
+                    t1 = parent.copy()
+                    t1.expand_layers_from(child, position, rule=rule)
+                    t2 = template.copy()
+                    t2.expand_layers(child, rule=rule)
+                    self.assertEqual(layers_of(t1), layers_of(t2))
+                    self.assertEqual(t1.report_uios(), t2.report_uios())
+
+                    #  The parent keeps its own layers.
+                    self.assertEqual(layers_of(parent), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()